@@ -0,0 +1,102 @@
+"""Compare list_response's Core path with loading ORM objects.
+
+Seeds a throwaway SQLite database with orders, then reports the median CPU
+time to serialize every order through Order.query.all() and through the
+Core SELECT that list_response runs, plus the wall time of one full
+/api/orders page with and without ?expand=.
+
+    python benchmarks/bench_list_response.py --orders 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def seed(orders):
+    with main.db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            'INSERT INTO "user" (id, username, password) '
+            "VALUES (1, 'bench', 'bench')")
+        connection.exec_driver_sql(
+            "INSERT INTO product (id, name, price) VALUES (1, 'Widget', 250)")
+        connection.exec_driver_sql(
+            'WITH RECURSIVE n(value) AS '
+            '(SELECT 1 UNION ALL SELECT value + 1 FROM n WHERE value < ?) '
+            'INSERT INTO "order" (user_id, product_id, quantity, total_price) '
+            'SELECT 1, 1, value % 5 + 1, (value % 5 + 1) * 250 FROM n', (orders,))
+
+
+def orm_all():
+    serialize = main.serializer_for(main.Order)
+    rows = [serialize(order) for order in main.Order.query.all()]
+    main.db.session.remove()
+    return rows
+
+
+def core_all():
+    serialize = main.serializer_for(main.Order)
+    table = main.Order.__table__
+    statement = main.db.select(*(table.c[name] for name in serialize.fields))
+    rows = [serialize.row(row) for row in main.db.session.execute(statement)]
+    main.db.session.remove()
+    return rows
+
+
+def median_cpu(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        function()
+        samples.append(time.process_time() - started)
+    return statistics.median(samples)
+
+
+def median_wall(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(samples)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        app = main.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+        with app.app_context():
+            main.create_schema()
+            seed(args.orders)
+            assert orm_all() == core_all()
+            orm = median_cpu(orm_all, args.repeat)
+            core = median_cpu(core_all, args.repeat)
+            print(f'{args.orders} orders, median of {args.repeat} runs (CPU)')
+            print(f'  Order.query.all():   {orm:.3f} s')
+            print(f'  Core select:         {core:.3f} s  ({orm / core:.1f}x less)')
+
+        client = app.test_client()
+        page = '/api/orders?limit=1000'
+        core = median_wall(client, page, args.repeat)
+        expanded = median_wall(client, page + '&expand=user', args.repeat)
+        print('one 1000-row page (wall)')
+        print(f'  Core path:           {core * 1000:.1f} ms')
+        print(f'  ORM path, ?expand=:  {expanded * 1000:.1f} ms')
+        with app.app_context():
+            main.db.engine.dispose()
+
+
+if __name__ == '__main__':
+    run()
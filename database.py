@@ -1,9 +1,36 @@
 import sqlite3
 
+# Production profile: WAL lets readers run alongside the single writer,
+# synchronous=NORMAL drops the per-commit fsync (WAL is still durable across
+# application crashes), and busy_timeout makes competing writers wait instead
+# of failing with "database is locked".
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+VERSIONED_TABLES = ['products', 'inventory', 'deliverymen']
+
+
+def apply_pragmas(connection, pragmas=None):
+  if pragmas is None:
+    pragmas = DEFAULT_PRAGMAS
+  cursor = connection.cursor()
+  for name, value in pragmas.items():
+    cursor.execute(f'PRAGMA {name} = {value}')
+  cursor.close()
+
 
 def create_tables(connection):
   cursor = connection.cursor()
 
+  # Money columns (price, total_price, unit_price, line_total, amount,
+  # total_revenue) hold integer cents.
+
   # Users table
   cursor.execute('''
         CREATE TABLE users (
@@ -22,7 +49,8 @@ def create_tables(connection):
         CREATE TABLE products (
             id INTEGER PRIMARY KEY,
             name TEXT NOT NULL,
-            price DECIMAL(10, 2) NOT NULL
+            price INTEGER NOT NULL,
+            barcode TEXT UNIQUE
         )
     ''')
 
@@ -31,15 +59,29 @@ def create_tables(connection):
         CREATE TABLE orders (
             id INTEGER PRIMARY KEY,
             user_id INTEGER NOT NULL,
-            product_id INTEGER NOT NULL,
+            product_id INTEGER,
             quantity INTEGER NOT NULL,
-            total_price DECIMAL(10, 2) NOT NULL,
+            total_price INTEGER NOT NULL,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users(id),
             FOREIGN KEY (product_id) REFERENCES products(id)
         )
     ''')
 
+  # Order lines table
+  cursor.execute('''
+        CREATE TABLE order_lines (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price INTEGER NOT NULL,
+            line_total INTEGER NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id),
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+    ''')
+
   # Customers table
   cursor.execute('''
         CREATE TABLE customers (
@@ -47,7 +89,13 @@ def create_tables(connection):
             first_name TEXT,
             last_name TEXT,
             email TEXT,
-            phone_number TEXT
+            phone_number TEXT,
+            phone_key TEXT GENERATED ALWAYS AS (
+                replace(replace(replace(replace(replace(replace(
+                    phone_number, ' ', ''), '-', ''), '(', ''), ')', ''), '.', ''),
+                    '+', '')
+            ) VIRTUAL,
+            email_key TEXT GENERATED ALWAYS AS (lower(trim(email))) VIRTUAL
         )
     ''')
 
@@ -56,7 +104,7 @@ def create_tables(connection):
         CREATE TABLE payments (
             id INTEGER PRIMARY KEY,
             order_id INTEGER NOT NULL,
-            amount DECIMAL(10, 2) NOT NULL,
+            amount INTEGER NOT NULL,
             payment_method TEXT,
             payment_status TEXT,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -68,8 +116,9 @@ def create_tables(connection):
   cursor.execute('''
         CREATE TABLE inventory (
             id INTEGER PRIMARY KEY,
-            product_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL UNIQUE,
             quantity INTEGER NOT NULL,
+            reorder_point INTEGER,
             FOREIGN KEY (product_id) REFERENCES products(id)
         )
     ''')
@@ -79,7 +128,7 @@ def create_tables(connection):
         CREATE TABLE sales (
             id INTEGER PRIMARY KEY,
             order_id INTEGER NOT NULL,
-            total_revenue DECIMAL(10, 2) NOT NULL,
+            total_revenue INTEGER NOT NULL,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (order_id) REFERENCES orders(id)
         )
@@ -110,12 +159,58 @@ def create_tables(connection):
         )
     ''')
 
+  # Table versions, bumped by triggers on every write to a versioned table
+  cursor.execute('''
+        CREATE TABLE table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+  for table in VERSIONED_TABLES:
+    cursor.execute(
+        'INSERT INTO table_versions (table_name, version) VALUES (?, 0)',
+        (table,))
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+      cursor.execute(f'''
+            CREATE TRIGGER {table}_version_{operation.lower()}
+            AFTER {operation} ON {table} BEGIN
+                UPDATE table_versions SET version = version + 1
+                WHERE table_name = '{table}';
+            END
+        ''')
+
+  # Indexes on foreign keys and timestamps
+  indexes = [
+      ('ix_orders_user_id', 'orders', 'user_id'),
+      ('ix_orders_product_id', 'orders', 'product_id'),
+      ('ix_orders_timestamp', 'orders', 'timestamp'),
+      ('ix_order_lines_order_id', 'order_lines', 'order_id'),
+      ('ix_order_lines_product_id', 'order_lines', 'product_id'),
+      ('ix_payments_order_id_timestamp', 'payments', 'order_id, timestamp'),
+      ('ix_sales_order_id_timestamp', 'sales', 'order_id, timestamp'),
+      ('ix_sales_timestamp', 'sales', 'timestamp'),
+      ('ix_deliveries_order_id', 'deliveries', 'order_id'),
+      ('ix_deliveries_deliveryman_id', 'deliveries', 'deliveryman_id'),
+      ('ix_customers_phone_key', 'customers', 'phone_key'),
+      ('ix_customers_email_key', 'customers', 'email_key'),
+  ]
+  for name, table, columns in indexes:
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+
+  # Partial index holding only rows at or below their reorder point
+  cursor.execute('''
+        CREATE INDEX IF NOT EXISTS ix_inventory_low_stock ON inventory (id)
+        WHERE quantity <= reorder_point
+    ''')
+
   connection.commit()
 
 
 def main():
   # Connect to SQLite database (creates a new file if not exists)
   connection = sqlite3.connect('pos_database.db')
+  apply_pragmas(connection)
 
   # Create tables
   create_tables(connection)
@@ -1,11 +1,174 @@
-from flask import Flask, request, jsonify, render_template
+import functools
+import operator
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import click
+from blinker import Namespace
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    abort,
+    current_app,
+    g,
+    has_request_context,
+    jsonify,
+    make_response,
+    render_template,
+    request,
+    stream_with_context,
+)
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///pos_database.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+from database import DEFAULT_PRAGMAS, apply_pragmas
 
-db = SQLAlchemy(app)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+db = SQLAlchemy()
+# Routes and CLI commands live on this blueprint and are attached to an app
+# by create_app, so importing this module builds no app.
+api = Blueprint('api', __name__, cli_group=None)
+
+CENT = Decimal('0.01')
+
+
+def to_money(value):
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def is_money(value):
+    if isinstance(value, bool):
+        return False
+    try:
+        return to_money(value).is_finite()
+    except (InvalidOperation, ValueError):
+        return False
+
+
+class Money(db.TypeDecorator):
+    # Amounts are stored as integer cents so SUMs stay on SQLite's exact
+    # integer path, and surface in Python as two-place Decimals.
+    impl = db.Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, _dialect):
+        if value is None:
+            return None
+        return int(to_money(value) * 100)
+
+    def process_result_value(self, value, _dialect):
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-2)
+
+
+class POSJSONProvider(DefaultJSONProvider):
+    # Keys keep the order the serializers emit them in, which is also what
+    # orjson does.
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        # Keep money as JSON numbers; a two-place Decimal always has an exact
+        # shortest float representation.
+        if isinstance(o, Decimal):
+            return float(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        # orjson is used when installed; datetimes are passed through to
+        # default() so both encoders produce the same output.
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+
+# Per-request SQL accounting: every statement run while handling a request is
+# counted and timed in g, and reported on the response. Statements are keyed
+# by their SQL text, which carries placeholders rather than values, so N+1
+# loads show up as one shape repeated many times.
+def start_query_timer(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def finish_query(conn, statement):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    if has_request_context() and 'db_statements' in g:
+        g.db_time += elapsed
+        g.db_statements[statement] += 1
+
+
+def record_query(conn, _cursor, statement, _parameters, _context, _executemany):
+    finish_query(conn, statement)
+
+
+def record_failed_query(context):
+    # after_cursor_execute does not fire for a statement that raises; its
+    # timer is popped here so it is not left on the pooled connection. A
+    # failure before the cursor ran (e.g. binding) never pushed one.
+    conn = context.connection
+    if conn is not None and conn.info.get('query_started'):
+        finish_query(conn, context.statement)
+
+
+def listen_engine_events(app):
+    # Attached to this app's engines only, never to the Engine class, so
+    # other engines in the process (and other apps) are left alone.
+    def set_sqlite_pragmas(dbapi_connection, _connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_pragmas(dbapi_connection, app.config['SQLITE_PRAGMAS'])
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'connect', set_sqlite_pragmas)
+        event.listen(engine, 'before_cursor_execute', start_query_timer)
+        event.listen(engine, 'after_cursor_execute', record_query)
+        event.listen(engine, 'handle_error', record_failed_query)
+
+
+@api.before_app_request
+def start_query_accounting():
+    g.db_time = 0.0
+    g.db_statements = Counter()
+
+
+@api.after_app_request
+def report_query_accounting(response):
+    if 'db_statements' not in g:
+        return response
+    queries = sum(g.db_statements.values())
+    response.headers['X-DB-Queries'] = str(queries)
+    response.headers['Server-Timing'] = f'db;dur={g.db_time * 1000:.2f};desc="SQL"'
+    threshold = current_app.config['QUERY_REPEAT_WARNING']
+    for statement, count in g.db_statements.most_common():
+        if count <= threshold:
+            break
+        current_app.logger.warning(
+            'Possible N+1: %s %s ran the same statement %d times: %s',
+            request.method, request.path, count, ' '.join(statement.split()))
+    return response
 
 
 class User(db.Model):
@@ -29,22 +192,29 @@ class User(db.Model):
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(Money, nullable=False)
+    barcode = db.Column(db.String(64), unique=True, index=True)
 
-    def __init__(self, name, price):
+    def __init__(self, name, price, barcode=None):
         self.name = name
         self.price = price
+        self.barcode = barcode
 
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, nullable=False)
-    product_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False,
+                        index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), index=True)
     quantity = db.Column(db.Integer, nullable=False)
-    total_price = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
-    user = db.relationship('User', backref='orders')
-    product = db.relationship('Product', backref='orders')
+    total_price = db.Column(Money, nullable=False)
+    timestamp = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp(),
+                          index=True)
+    # passive_deletes='all': deleting a user or product never rewrites past
+    # orders; the routes refuse the delete while any still refer to it.
+    user = db.relationship('User', backref=db.backref('orders', passive_deletes='all'))
+    product = db.relationship('Product',
+                              backref=db.backref('orders', passive_deletes='all'))
 
     def __init__(self, user_id, product_id, quantity, total_price):
         self.user_id = user_id
@@ -53,12 +223,63 @@ class Order(db.Model):
         self.total_price = total_price
 
 
+class OrderLine(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False,
+                         index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False,
+                           index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(Money, nullable=False)
+    line_total = db.Column(Money, nullable=False)
+    order = db.relationship(
+        'Order', backref=db.backref('lines', cascade='all, delete-orphan'))
+    product = db.relationship('Product')
+
+    def __init__(self, order_id, product_id, quantity, unit_price):
+        self.order_id = order_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.unit_price = to_money(unit_price)
+        self.line_total = self.unit_price * quantity
+
+
+# Separators dropped from phone numbers before they are compared, so
+# "+1 (555) 010-2030" and "15550102030" are the same customer.
+PHONE_SEPARATORS = ' -().+'
+
+
+def normalize_phone(value):
+    return value.translate({ord(char): None for char in PHONE_SEPARATORS})
+
+
+def normalize_email(value):
+    # Must match email_key: SQLite's trim() strips spaces only.
+    return value.strip(' ').lower()
+
+
+def phone_key_sql(column):
+    expression = column
+    for char in PHONE_SEPARATORS:
+        expression = f"replace({expression}, '{char}', '')"
+    return expression
+
+
 class Customer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50))
     last_name = db.Column(db.String(50))
     email = db.Column(db.String(100))
     phone_number = db.Column(db.String(15))
+    # Lookup keys are generated by SQLite, so they stay correct for every
+    # write path, bulk Core inserts included. Households can share a phone
+    # or email, so the indexes are not unique.
+    phone_key = db.Column(db.String(15),
+                          db.Computed(phone_key_sql('phone_number'), persisted=False),
+                          index=True)
+    email_key = db.Column(db.String(100),
+                          db.Computed('lower(trim(email))', persisted=False),
+                          index=True)
 
     def __init__(self, first_name, last_name, email, phone_number):
         self.first_name = first_name
@@ -69,12 +290,16 @@ class Customer(db.Model):
 
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    amount = db.Column(Money, nullable=False)
     payment_method = db.Column(db.String(50))
     payment_status = db.Column(db.String(50))
     timestamp = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
-    order = db.relationship('Order', backref='payments')
+    order = db.relationship(
+        'Order', backref=db.backref('payments', cascade='all, delete-orphan'))
+    # Also serves plain order_id lookups as its leftmost prefix.
+    __table_args__ = (
+        db.Index('ix_payment_order_id_timestamp', 'order_id', 'timestamp'),)
 
     def __init__(self, order_id, amount, payment_method, payment_status):
         self.order_id = order_id
@@ -85,21 +310,39 @@ class Payment(db.Model):
 
 class Inventory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    product_id = db.Column(db.Integer, nullable=False)
+    # One stock row per product, so stock checks and adjustments see the
+    # product's whole quantity.
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False,
+                           index=True, unique=True)
     quantity = db.Column(db.Integer, nullable=False)
-    product = db.relationship('Product', backref='inventory')
-
-    def __init__(self, product_id, quantity):
+    # NULL means no reorder point: the row is never reported as low stock.
+    reorder_point = db.Column(db.Integer)
+    product = db.relationship('Product',
+                              backref=db.backref('inventory', passive_deletes='all'))
+
+    # Only rows at or below their reorder point are indexed, so the low-stock
+    # query reads a handful of entries instead of scanning inventory. Keyed
+    # on id so the keyset-paginated listing walks the index in order.
+    __table_args__ = (
+        db.Index('ix_inventory_low_stock', 'id',
+                 sqlite_where=db.text('quantity <= reorder_point')),
+    )
+
+    def __init__(self, product_id, quantity, reorder_point=None):
         self.product_id = product_id
         self.quantity = quantity
+        self.reorder_point = reorder_point
 
 
 class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, nullable=False)
-    total_revenue = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
-    order = db.relationship('Order', backref='sales')
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    total_revenue = db.Column(Money, nullable=False)
+    timestamp = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp(),
+                          index=True)
+    order = db.relationship(
+        'Order', backref=db.backref('sales', cascade='all, delete-orphan'))
+    __table_args__ = (db.Index('ix_sale_order_id_timestamp', 'order_id', 'timestamp'),)
 
     def __init__(self, order_id, total_revenue):
         self.order_id = order_id
@@ -122,12 +365,14 @@ class Deliveryman(db.Model):
 
 class Delivery(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, nullable=False)
-    deliveryman_id = db.Column(db.Integer)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False,
+                         index=True)
+    deliveryman_id = db.Column(db.Integer, db.ForeignKey('deliveryman.id'), index=True)
     delivery_status = db.Column(db.String(50))
     delivery_address = db.Column(db.String(255))
     delivery_timestamp = db.Column(db.TIMESTAMP)
-    order = db.relationship('Order', backref='deliveries')
+    order = db.relationship(
+        'Order', backref=db.backref('deliveries', cascade='all, delete-orphan'))
     deliveryman = db.relationship('Deliveryman', backref='deliveries')
 
     def __init__(self, order_id, deliveryman_id, delivery_status, delivery_address, delivery_timestamp):
@@ -138,24 +383,873 @@ class Delivery(db.Model):
         self.delivery_timestamp = delivery_timestamp
 
 
-@app.route('/')
+class DailySalesRollup(db.Model):
+    __tablename__ = 'daily_sales_rollup'
+    day = db.Column(db.String(10), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    sales = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(Money, nullable=False, default=0)
+
+
+class TableVersion(db.Model):
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Tables whose writes bump their TableVersion row. The bump is done by
+# triggers so bulk inserts and raw SQL are counted as well as ORM writes.
+VERSIONED_TABLES = ['product', 'inventory', 'deliveryman', 'daily_sales_rollup']
+
+
+def install_version_triggers(connection, table_name):
+    connection.execute(
+        db.text('INSERT OR IGNORE INTO table_version (table_name, version) '
+                'VALUES (:name, 0)'), {'name': table_name})
+    for operation in ('INSERT', 'UPDATE', 'DELETE'):
+        connection.exec_driver_sql(
+            f'CREATE TRIGGER IF NOT EXISTS "{table_name}_version_{operation.lower()}" '
+            f'AFTER {operation} ON "{table_name}" BEGIN '
+            f"UPDATE table_version SET version = version + 1 "
+            f"WHERE table_name = '{table_name}'; END")
+
+
+def rollup_delta_sql(row, sign):
+    # Upserts the products of one sale into its day's rollup rows; sign is
+    # 1 to add the sale and -1 to remove it.
+    return (
+        f'INSERT INTO daily_sales_rollup (day, product_id, sales, units, revenue) '
+        f'SELECT date({row}.timestamp), product_id, {sign}, '
+        f'{sign} * SUM(quantity), {sign} * SUM(revenue) FROM ('
+        f'SELECT product_id, quantity, total_price AS revenue FROM "order" '
+        f'WHERE id = {row}.order_id AND product_id IS NOT NULL '
+        f'UNION ALL '
+        f'SELECT product_id, quantity, line_total FROM order_line '
+        f'WHERE order_id = {row}.order_id) '
+        f'GROUP BY product_id '
+        f'ON CONFLICT (day, product_id) DO UPDATE SET '
+        f'sales = sales + excluded.sales, '
+        f'units = units + excluded.units, '
+        f'revenue = revenue + excluded.revenue;')
+
+
+def header_items_sql(row):
+    return (f'SELECT {row}.product_id AS product_id, {row}.quantity AS quantity, '
+            f'{row}.total_price AS revenue WHERE {row}.product_id IS NOT NULL')
+
+
+def line_items_sql(order_id, exclude=()):
+    excluded = f" AND id NOT IN ({', '.join(exclude)})" if exclude else ''
+    return (f'SELECT product_id, quantity, line_total FROM order_line '
+            f'WHERE order_id = {order_id}{excluded}')
+
+
+def order_rollup_delta_sql(order_id, items, sign):
+    # Adds (sign 1) or removes (sign -1) the given item set once for every
+    # sale of the order, on each sale's day. Order and line triggers remove
+    # the items as they were and add them as they are now, so the rollup
+    # matches what a rebuild from sold_items() would produce.
+    return (
+        f'INSERT INTO daily_sales_rollup (day, product_id, sales, units, revenue) '
+        f'SELECT date(sale.timestamp), items.product_id, {sign}, '
+        f'{sign} * SUM(items.quantity), {sign} * SUM(items.revenue) '
+        f'FROM sale JOIN ({items}) AS items '
+        f'WHERE sale.order_id = {order_id} '
+        f'GROUP BY sale.id, items.product_id '
+        f'ON CONFLICT (day, product_id) DO UPDATE SET '
+        f'sales = sales + excluded.sales, '
+        f'units = units + excluded.units, '
+        f'revenue = revenue + excluded.revenue;')
+
+
+def order_line_moved_sql(order_id, before, after):
+    header = (f'SELECT product_id AS product_id, quantity AS quantity, '
+              f'total_price AS revenue FROM "order" '
+              f'WHERE id = {order_id} AND product_id IS NOT NULL')
+    return (order_rollup_delta_sql(order_id, f'{header} UNION ALL {before}', -1) + ' ' +
+            order_rollup_delta_sql(order_id, f'{header} UNION ALL {after}', 1))
+
+
+def install_rollup_triggers(connection):
+    # The rollup is kept current inside the transaction that writes the
+    # sale, whichever code path does the write. Edits to an order or its
+    # lines after the sale are applied as a delta to every sale of the order.
+    old_line = 'SELECT OLD.product_id, OLD.quantity, OLD.line_total'
+    moved = ['OLD.id', 'NEW.id']
+    triggers = {
+        'sale_rollup_insert': ('AFTER INSERT ON sale', rollup_delta_sql('NEW', 1)),
+        'sale_rollup_delete': ('AFTER DELETE ON sale', rollup_delta_sql('OLD', -1)),
+        'sale_rollup_update': (
+            'AFTER UPDATE OF order_id, timestamp ON sale',
+            rollup_delta_sql('OLD', -1) + ' ' + rollup_delta_sql('NEW', 1)),
+        'order_rollup_update': (
+            'AFTER UPDATE OF product_id, quantity, total_price ON "order"',
+            order_rollup_delta_sql('OLD.id', header_items_sql('OLD') + ' UNION ALL ' +
+                                   line_items_sql('OLD.id'), -1) + ' ' +
+            order_rollup_delta_sql('NEW.id', header_items_sql('NEW') + ' UNION ALL ' +
+                                   line_items_sql('NEW.id'), 1)),
+        'order_line_rollup_insert': (
+            'AFTER INSERT ON order_line',
+            order_line_moved_sql('NEW.order_id',
+                                 line_items_sql('NEW.order_id', ['NEW.id']),
+                                 line_items_sql('NEW.order_id'))),
+        'order_line_rollup_delete': (
+            'AFTER DELETE ON order_line',
+            order_line_moved_sql('OLD.order_id',
+                                 f"{line_items_sql('OLD.order_id')} "
+                                 f'UNION ALL {old_line}',
+                                 line_items_sql('OLD.order_id'))),
+        # An update is a delete from the old order followed by an insert into
+        # the new one, which may be the same order.
+        'order_line_rollup_update': (
+            'AFTER UPDATE OF order_id, product_id, quantity, line_total ON order_line',
+            order_line_moved_sql('OLD.order_id',
+                                 f"{line_items_sql('OLD.order_id', moved)} "
+                                 f'UNION ALL {old_line}',
+                                 line_items_sql('OLD.order_id', moved)) + ' ' +
+            order_line_moved_sql('NEW.order_id',
+                                 line_items_sql('NEW.order_id', moved),
+                                 line_items_sql('NEW.order_id'))),
+    }
+    for name, (event_clause, body) in triggers.items():
+        connection.exec_driver_sql(
+            f'CREATE TRIGGER IF NOT EXISTS {name} {event_clause} BEGIN {body} END')
+
+
+def install_product_search(connection):
+    # External-content FTS5 index over product.name, so names are not stored
+    # twice; prefix='2 3' adds prefix indexes for type-ahead lookups.
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'product_fts'").scalar()
+    if not exists:
+        connection.exec_driver_sql(
+            "CREATE VIRTUAL TABLE product_fts USING fts5("
+            "name, content='product', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        connection.exec_driver_sql(
+            "INSERT INTO product_fts (product_fts) VALUES ('rebuild')")
+    triggers = {
+        'product_fts_insert': (
+            'AFTER INSERT ON product BEGIN '
+            'INSERT INTO product_fts (rowid, name) VALUES (NEW.id, NEW.name); END'),
+        'product_fts_delete': (
+            'AFTER DELETE ON product BEGIN '
+            "INSERT INTO product_fts (product_fts, rowid, name) "
+            "VALUES ('delete', OLD.id, OLD.name); END"),
+        'product_fts_update': (
+            'AFTER UPDATE OF name ON product BEGIN '
+            "INSERT INTO product_fts (product_fts, rowid, name) "
+            "VALUES ('delete', OLD.id, OLD.name); "
+            'INSERT INTO product_fts (rowid, name) VALUES (NEW.id, NEW.name); END'),
+    }
+    for name, body in triggers.items():
+        connection.exec_driver_sql(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+def rebuild_sales_rollup(connection):
+    items = sold_items()
+    day = db.func.date(Sale.timestamp)
+    connection.execute(db.delete(DailySalesRollup))
+    connection.execute(db.insert(DailySalesRollup).from_select(
+        ['day', 'product_id', 'sales', 'units', 'revenue'],
+        db.select(day, items.c.product_id,
+                  db.func.count(db.distinct(Sale.id)),
+                  db.func.sum(items.c.quantity),
+                  db.func.sum(items.c.revenue))
+        .join(items, items.c.order_id == Sale.order_id)
+        .group_by(day, items.c.product_id)))
+
+
+def table_version(table_name):
+    return db.session.execute(
+        db.select(TableVersion.version).where(TableVersion.table_name == table_name)
+    ).scalar()
+
+
+def rebuild_table(connection, table, conversions=None):
+    # SQLite cannot change a column's type or constraints in place, so copy
+    # the rows into a freshly created table and swap it in. Indexes are
+    # recreated afterwards by create_schema.
+    conversions = conversions or {}
+    existing = {column['name']
+                for column in inspect(connection).get_columns(table.name)}
+    staging = table.to_metadata(db.metadata, name=f'{table.name}_new')
+    try:
+        connection.execute(CreateTable(staging))
+    finally:
+        db.metadata.remove(staging)
+    columns = [column.name for column in table.columns if column.name in existing]
+    select_list = ', '.join(conversions.get(name, f'"{name}"') for name in columns)
+    column_list = ', '.join(f'"{name}"' for name in columns)
+    connection.exec_driver_sql(
+        f'INSERT INTO "{staging.name}" ({column_list}) '
+        f'SELECT {select_list} FROM "{table.name}"')
+    connection.exec_driver_sql(f'DROP TABLE "{table.name}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{staging.name}" RENAME TO "{table.name}"')
+
+
+def migrate_money_to_cents(connection, tables):
+    money_columns = {
+        'product': ['price'],
+        'order': ['total_price'],
+        'order_line': ['unit_price', 'line_total'],
+        'payment': ['amount'],
+        'sale': ['total_revenue'],
+    }
+    for name, columns in money_columns.items():
+        if name in tables:
+            rebuild_table(connection, db.metadata.tables[name], {
+                column: f'CAST(ROUND("{column}" * 100) AS INTEGER)'
+                for column in columns
+            })
+
+
+def migrate_backfill_sales_rollup(connection, tables):
+    if 'sale' in tables:
+        db.metadata.create_all(connection)
+        rebuild_sales_rollup(connection)
+
+
+def migrate_customer_lookup_keys(connection, tables):
+    # SQLite can add VIRTUAL generated columns in place; their indexes are
+    # built by create_schema afterwards.
+    if 'customer' in tables:
+        for name in ['phone_key', 'email_key']:
+            column = Customer.__table__.c[name]
+            connection.exec_driver_sql(
+                f'ALTER TABLE customer ADD COLUMN {name} {column.type.compile()} '
+                f'GENERATED ALWAYS AS ({column.computed.sqltext}) VIRTUAL')
+
+
+def migrate_product_barcode(connection, tables):
+    # The money migration rebuilds product from the current model, so the
+    # column may already be there on databases upgraded from scratch.
+    if 'product' in tables:
+        columns = {column['name']
+                   for column in inspect(connection).get_columns('product')}
+        if 'barcode' not in columns:
+            connection.exec_driver_sql(
+                'ALTER TABLE product ADD COLUMN barcode VARCHAR(64)')
+
+
+def migrate_inventory_reorder_point(connection, tables):
+    if 'inventory' in tables:
+        connection.exec_driver_sql(
+            'ALTER TABLE inventory ADD COLUMN reorder_point INTEGER')
+
+
+def migrate_unique_inventory_product(connection, tables):
+    # Duplicate stock rows are merged into the oldest row for the product
+    # before the plain product_id index is replaced by a unique one, which
+    # create_schema builds afterwards.
+    if 'inventory' in tables:
+        connection.exec_driver_sql(
+            'UPDATE inventory SET '
+            'quantity = (SELECT SUM(quantity) FROM inventory AS other '
+            'WHERE other.product_id = inventory.product_id), '
+            'reorder_point = (SELECT MAX(reorder_point) FROM inventory AS other '
+            'WHERE other.product_id = inventory.product_id) '
+            'WHERE id IN (SELECT MIN(id) FROM inventory GROUP BY product_id '
+            'HAVING COUNT(*) > 1)')
+        connection.exec_driver_sql(
+            'DELETE FROM inventory WHERE id NOT IN '
+            '(SELECT MIN(id) FROM inventory GROUP BY product_id)')
+        connection.exec_driver_sql('DROP INDEX IF EXISTS ix_inventory_product_id')
+
+
+def migrate_order_rollup_triggers(connection, tables):
+    # Order and line edits made before their triggers existed never reached
+    # the rollup; rebuild it once. The triggers are installed by create_schema.
+    if 'sale' in tables:
+        rebuild_sales_rollup(connection)
+
+
+def migrate_clean_reorder_points(connection, tables):
+    # Reorder points used to be stored unchecked; SQLite keeps a string as
+    # text, which compares above every quantity. Anything that is not a
+    # non-negative integer is cleared.
+    if 'inventory' in tables:
+        connection.exec_driver_sql(
+            "UPDATE inventory SET reorder_point = NULL "
+            "WHERE typeof(reorder_point) != 'integer' OR reorder_point < 0")
+
+
+# Applied in order to databases created before the step existed; the
+# count of applied steps is kept in SQLite's user_version.
+MIGRATIONS = [
+    migrate_money_to_cents,
+    migrate_backfill_sales_rollup,
+    migrate_customer_lookup_keys,
+    migrate_product_barcode,
+    migrate_inventory_reorder_point,
+    migrate_unique_inventory_product,
+    migrate_order_rollup_triggers,
+    migrate_clean_reorder_points,
+]
+
+
+def create_schema():
+    with db.engine.begin() as connection:
+        tables = set(inspect(connection).get_table_names())
+        version = connection.exec_driver_sql('PRAGMA user_version').scalar()
+        if tables:
+            for migration in MIGRATIONS[version:]:
+                migration(connection, tables)
+        db.metadata.create_all(connection)
+        # create_all skips tables that already exist, so indexes added to an
+        # existing model would never be built without this pass.
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        for table_name in VERSIONED_TABLES:
+            install_version_triggers(connection, table_name)
+        install_rollup_triggers(connection)
+        install_product_search(connection)
+        connection.exec_driver_sql(f'PRAGMA user_version = {len(MIGRATIONS)}')
+
+
+@api.cli.command('create-schema')
+def create_schema_command():
+    """Create tables, indexes and triggers and apply pending migrations."""
+    create_schema()
+    click.echo(f'Schema is at version {len(MIGRATIONS)}')
+
+
+@api.cli.command('backfill-rollup')
+def backfill_rollup_command():
+    """Rebuild daily_sales_rollup from the full sales history."""
+    with db.engine.begin() as connection:
+        rebuild_sales_rollup(connection)
+    click.echo('daily_sales_rollup rebuilt')
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def page_params():
+    after_id = request.args.get('after_id', 0, type=int)
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return after_id, min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def paginate(query, model):
+    after_id, limit = page_params()
+    # Seek on the primary key instead of OFFSET so every page is an index
+    # range scan, however deep the client pages.
+    rows = query.filter(model.id > after_id).order_by(model.id).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+STREAM_CHUNK_SIZE = 1000
+
+
+def wants_stream():
+    return request.args.get('stream', '0') not in ('', '0', 'false')
+
+
+def stream_collection(rows):
+    # ?stream=ndjson emits one object per line; any other truthy value emits
+    # a single JSON array. rows is a lazy iterable of dicts, consumed and
+    # flushed STREAM_CHUNK_SIZE at a time so memory stays flat regardless of
+    # table size.
+    ndjson = request.args.get('stream') == 'ndjson'
+    dumps = current_app.json.dumps
+
+    def generate():
+        if not ndjson:
+            yield '['
+        separator = '\n' if ndjson else ','
+        first = True
+        chunk = []
+        for row in rows:
+            chunk.append(dumps(row))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield ('' if first else separator) + separator.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else separator) + separator.join(chunk)
+            first = False
+        if ndjson:
+            yield '' if first else '\n'
+        else:
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+# Columns each model exposes, and so the names ?fields= may select.
+SERIALIZED_FIELDS = {
+    User: ['id', 'username', 'email'],
+    Product: ['id', 'name', 'price', 'barcode'],
+    Order: ['id', 'user_id', 'product_id', 'quantity', 'total_price', 'timestamp'],
+    OrderLine: ['id', 'order_id', 'product_id', 'quantity', 'unit_price', 'line_total'],
+    Customer: ['id', 'first_name', 'last_name', 'email', 'phone_number'],
+    Payment: ['id', 'order_id', 'amount', 'payment_method', 'payment_status',
+              'timestamp'],
+    Inventory: ['id', 'product_id', 'quantity', 'reorder_point'],
+    Sale: ['id', 'order_id', 'total_revenue', 'timestamp'],
+    Deliveryman: ['id', 'first_name', 'last_name', 'email', 'phone_number'],
+    Delivery: ['id', 'order_id', 'deliveryman_id', 'delivery_status',
+               'delivery_address', 'delivery_timestamp'],
+}
+
+
+def column_converter(column_type):
+    if isinstance(column_type, Money):
+        return float
+    if isinstance(column_type, db.DateTime):
+        return datetime.isoformat
+    return None
+
+
+class Serializer:
+    # Turns a model instance, or a row tuple in field order, into a dict.
+    # Converters for values JSON cannot take as-is (money, timestamps) are
+    # chosen once from the column types, so each row costs one attrgetter
+    # call, a pass over the few converted positions and a zip.
+
+    def __init__(self, model, fields):
+        self.fields = tuple(fields)
+        getter = operator.attrgetter(*self.fields)
+        self._values = getter if len(self.fields) > 1 else lambda obj: (getter(obj),)
+        columns = model.__table__.c
+        self._converters = []
+        for position, name in enumerate(self.fields):
+            convert = column_converter(columns[name].type)
+            if convert is not None:
+                self._converters.append((position, convert))
+
+    def __call__(self, obj):
+        return self.row(self._values(obj))
+
+    def row(self, values):
+        if self._converters:
+            values = list(values)
+            for position, convert in self._converters:
+                if values[position] is not None:
+                    values[position] = convert(values[position])
+        return dict(zip(self.fields, values, strict=True))
+
+
+@functools.lru_cache(maxsize=256)
+def serializer_for(model, fields=None):
+    return Serializer(model, fields or SERIALIZED_FIELDS[model])
+
+
+for serialized_model in SERIALIZED_FIELDS:
+    serializer_for(serialized_model)
+
+# Relationships that ?expand= may embed, with the model each one loads.
+EXPANSIONS = {
+    Order: {'user': User, 'product': Product},
+    Payment: {'order': Order},
+    Sale: {'order': Order},
+    Delivery: {'order': Order, 'deliveryman': Deliveryman},
+}
+
+
+def list_param(name, allowed):
+    names = [value for value in request.args.get(name, '').split(',') if value]
+    unknown = [value for value in names if value not in allowed]
+    if unknown:
+        abort(make_response(jsonify({
+            'message': f"Unknown {name}: {', '.join(unknown)}"
+        }), 400))
+    return names
+
+
+def shaped(model):
+    # ?fields= narrows the SELECT list with load_only and the output to the
+    # same keys. ?expand= joins each named relationship into the same SELECT
+    # and embeds it, instead of the client issuing one GET (and one lazy
+    # load) per row.
+    fields = list_param('fields', SERIALIZED_FIELDS[model])
+    names = list_param('expand', EXPANSIONS.get(model, {}))
+    serialize = serializer_for(model, tuple(fields) or None)
+    query = model.query
+    if fields:
+        query = query.options(db.load_only(*(getattr(model, name) for name in fields)))
+    if not names:
+        return query, serialize
+    query = query.options(*(db.joinedload(getattr(model, name)) for name in names))
+    related = [(name, serializer_for(EXPANSIONS[model][name])) for name in names]
+
+    def serialize_expanded(row):
+        data = serialize(row)
+        for name, serialize_related in related:
+            value = getattr(row, name)
+            data[name] = None if value is None else serialize_related(value)
+        return data
+
+    return query, serialize_expanded
+
+
+def list_response(model, streamable=False, filters=()):
+    # Plain lists are read with a Core SELECT of just the serialized columns
+    # and turned into dicts straight from the row tuples, skipping ORM
+    # instances, identity-map bookkeeping and attribute instrumentation.
+    # Only ?expand= needs mapped objects and takes the ORM path.
+    stream = streamable and wants_stream()
+    if request.args.get('expand'):
+        query, serialize = shaped(model)
+        if stream:
+            after_id = request.args.get('after_id', 0, type=int)
+            query = query.filter(model.id > after_id, *filters).order_by(model.id)
+            return stream_collection(
+                serialize(row) for row in query.yield_per(STREAM_CHUNK_SIZE))
+        rows, next_cursor = paginate(query.filter(*filters), model)
+        return jsonify({'items': [serialize(row) for row in rows],
+                        'next_cursor': next_cursor})
+
+    fields = list_param('fields', SERIALIZED_FIELDS[model])
+    serialize = serializer_for(model, tuple(fields) or None)
+    table = model.__table__
+    after_id, limit = page_params()
+    statement = (db.select(table.c.id, *(table.c[name] for name in serialize.fields))
+                 .where(table.c.id > after_id, *filters)
+                 .order_by(table.c.id))
+    if stream:
+        result = db.session.execute(
+            statement.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        return stream_collection(serialize.row(row[1:]) for row in result)
+    rows = db.session.execute(statement.limit(limit + 1)).all()
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return jsonify({'items': [serialize.row(row[1:]) for row in rows[:limit]],
+                    'next_cursor': next_cursor})
+
+
+def adjust_stock(deltas):
+    # One UPDATE ... RETURNING per product. Decrements only match a row that
+    # still holds enough stock, so two tills can never sell the same last
+    # unit and no read-modify-write round trip is needed. Returns the new
+    # (quantity, reorder_point) rows, or None and the first product that was
+    # short (or has no inventory row); the caller rolls back.
+    levels = {}
+    for product_id, delta in deltas.items():
+        statement = (db.update(Inventory)
+                     .where(Inventory.product_id == product_id)
+                     .values(quantity=Inventory.quantity + delta)
+                     .returning(Inventory.quantity, Inventory.reorder_point)
+                     .execution_options(synchronize_session=False))
+        if delta < 0:
+            statement = statement.where(Inventory.quantity >= -delta)
+        level = db.session.execute(statement).first()
+        if level is None:
+            return None, product_id
+        levels[product_id] = level
+    return levels, None
+
+
+stock_signals = Namespace()
+# Sent once per product whose stock falls to or below its reorder point,
+# after the adjustment has been committed.
+stock_low = stock_signals.signal('stock-low')
+
+
+@stock_low.connect
+def log_low_stock(_sender, product_id, quantity, reorder_point):
+    current_app.logger.warning('Product %s is low on stock: %s left, reorder point %s',
+                               product_id, quantity, reorder_point)
+
+
+REORDER_POINT_ERROR = 'reorder_point must be a non-negative integer or null'
+
+
+def is_reorder_point(value):
+    return value is None or (is_integer(value) and value >= 0)
+
+
+def low_stock_alerts(deltas, levels):
+    # Only a crossing is announced: a sale that leaves already-low stock
+    # lower does not raise the alert again. Worked out before the commit so
+    # nothing after it can fail on the row's values.
+    alerts = []
+    for product_id, level in levels.items():
+        if level.reorder_point is None:
+            continue
+        before = level.quantity - deltas[product_id]
+        if level.quantity <= level.reorder_point < before:
+            alerts.append({'product_id': product_id, 'quantity': level.quantity,
+                           'reorder_point': level.reorder_point})
+    return alerts
+
+
+def announce_low_stock(alerts):
+    # Runs after the commit: a failing receiver is logged rather than
+    # turning a completed sale into a 500 that the till would retry.
+    app = current_app._get_current_object()
+    for alert in alerts:
+        try:
+            stock_low.send(app, **alert)
+        except Exception:
+            app.logger.exception('stock-low receiver failed for product %s',
+                                 alert['product_id'])
+    return alerts
+
+
+def stock_error(product_id):
+    db.session.rollback()
+    if db.session.query(Inventory.id).filter_by(product_id=product_id).first() is None:
+        return jsonify({'message': f'No inventory for product {product_id}'}), 404
+    return jsonify({'message': 'Insufficient inventory', 'product_id': product_id}), 409
+
+
+def is_stock_delta(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value != 0
+
+
+def build_order_lines(order_id, lines):
+    # Lines without a unit_price are priced from the catalog in one IN query.
+    unpriced = {line['product_id'] for line in lines if 'unit_price' not in line}
+    prices = {}
+    if unpriced:
+        prices = dict(db.session.query(Product.id, Product.price)
+                      .filter(Product.id.in_(unpriced)))
+    rows = []
+    for line in lines:
+        unit_price = line.get('unit_price', prices.get(line['product_id']))
+        if unit_price is None:
+            return None
+        unit_price = to_money(unit_price)
+        rows.append({
+            'order_id': order_id,
+            'product_id': line['product_id'],
+            'quantity': line['quantity'],
+            'unit_price': unit_price,
+            'line_total': unit_price * line['quantity']
+        })
+    return rows
+
+
+CatalogSnapshot = namedtuple('CatalogSnapshot',
+                             ['version', 'ids', 'encoded', 'barcodes'])
+
+
+class CatalogCache:
+    # Per-app copy of the product catalog with every product pre-encoded as
+    # JSON. Local writes invalidate it directly; writes from other workers
+    # are picked up through the product TableVersion, which is checked at
+    # most once per CATALOG_CACHE_CHECK_INTERVAL seconds.
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        # Not under the lock, so a load already in progress may have read
+        # the catalog before this write; bumping the generation stops it
+        # from storing that snapshot.
+        self._generation += 1
+        self._snapshot = None
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        now = time.monotonic()
+        interval = current_app.config['CATALOG_CACHE_CHECK_INTERVAL']
+        if snapshot is not None and now - self._checked_at < interval:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            version = table_version('product')
+            if snapshot is None or snapshot.version != version:
+                generation = self._generation
+                snapshot = self._load(version)
+                if generation != self._generation:
+                    return snapshot
+                self._snapshot = snapshot
+            self._checked_at = now
+        return snapshot
+
+    def _load(self, version):
+        # The version is read before the rows, so a write racing the load
+        # leaves the snapshot tagged as stale rather than silently current.
+        dumps = current_app.json.dumps
+        serialize = serializer_for(Product)
+        products = Product.query.order_by(Product.id).all()
+        return CatalogSnapshot(
+            version=version,
+            ids=[product.id for product in products],
+            encoded={product.id: dumps(serialize(product)) for product in products},
+            barcodes={product.barcode: product.id
+                      for product in products if product.barcode is not None})
+
+    def page(self, after_id, limit):
+        snapshot = self.snapshot()
+        start = bisect_right(snapshot.ids, after_id)
+        ids = snapshot.ids[start:start + limit]
+        next_cursor = ids[-1] if start + limit < len(snapshot.ids) else None
+        return ('{"items": [' + ', '.join(snapshot.encoded[i] for i in ids) +
+                '], "next_cursor": ' + current_app.json.dumps(next_cursor) + '}')
+
+    def get(self, product_id):
+        return self.snapshot().encoded.get(product_id)
+
+    def get_by_barcode(self, barcode):
+        snapshot = self.snapshot()
+        product_id = snapshot.barcodes.get(barcode)
+        return snapshot.encoded[product_id] if product_id is not None else None
+
+    def encode_many(self, product_ids):
+        encoded = self.snapshot().encoded
+        return '[' + ', '.join(encoded[i] for i in product_ids if i in encoded) + ']'
+
+
+def catalog_cache():
+    # One cache per app, so apps bound to different databases never serve
+    # each other's catalog.
+    return current_app.extensions['catalog_cache']
+
+
+def sold_items():
+    # One row per product sold: single-product orders carry the product on
+    # the header, basket orders on their lines.
+    return db.union_all(
+        db.select(Order.id.label('order_id'),
+                  Order.product_id.label('product_id'),
+                  Order.quantity.label('quantity'),
+                  Order.total_price.label('revenue'))
+        .where(Order.product_id.isnot(None)),
+        db.select(OrderLine.order_id, OrderLine.product_id,
+                  OrderLine.quantity, OrderLine.line_total)
+    ).subquery('sold_items')
+
+
+REPORT_BUCKETS = {
+    'hour': lambda column: db.func.strftime('%Y-%m-%d %H:00', column),
+    'day': lambda column: db.func.date(column),
+    # Weeks start on Monday.
+    'week': lambda column: db.func.date(column, '-6 days', 'weekday 1'),
+}
+
+
+def parse_report_time(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    # Compared as text against the stored 'YYYY-MM-DD HH:MM:SS' values so the
+    # timestamp index stays usable. Stored times are UTC, so values with an
+    # offset are converted; naive values are taken as UTC already.
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def conditional_get(table_name, version=None):
+    # Strong ETag for GETs taken from the table's change counter, so a
+    # matching If-None-Match is answered with 304 before the view runs.
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            current = version() if version else table_version(table_name)
+            etag = f'{table_name}-{current}'
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def catalog_version():
+    return catalog_cache().snapshot().version
+
+
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# Checked against the column type of every supplied field; Money is listed
+# first because it is stored as an Integer.
+FIELD_CHECKS = [
+    (Money, is_money, 'a number'),
+    (db.Integer, is_integer, 'an integer'),
+    (db.String, lambda value: isinstance(value, str), 'a string'),
+]
+
+
+def field_error(model, field, value):
+    column_type = model.__table__.c[field].type
+    for type_, check, description in FIELD_CHECKS:
+        if isinstance(column_type, type_):
+            return None if check(value) else f'{field} must be {description}'
+    return None
+
+
+def bulk_create(model, items, required, optional, label):
+    # The whole batch is validated before anything is written, then inserted
+    # with INSERT ... RETURNING in a single transaction.
+    if not items:
+        return jsonify({'message': 'Request body must not be empty'}), 400
+    fields = required + optional
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            return jsonify({'message': f'Item {position} must be an object'}), 400
+        missing = [field for field in required if item.get(field) is None]
+        if missing:
+            return jsonify({
+                'message': f"Item {position} is missing {', '.join(missing)}"
+            }), 400
+        for field in fields:
+            if item.get(field) is not None:
+                error = field_error(model, field, item[field])
+                if error:
+                    return jsonify({'message': f'Item {position}: {error}'}), 400
+
+    rows = [{field: item.get(field) for field in fields} for item in items]
+    # One executemany. The INSERT holds the write lock until the commit and
+    # SQLite assigns each new rowid as max + 1, so the batch's ids are the
+    # top len(rows) ids, in input order.
+    try:
+        db.session.execute(db.insert(model), rows)
+        last_id = db.session.execute(db.select(db.func.max(model.id))).scalar()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': f'{label} violate a uniqueness constraint'}), 409
+    ids = list(range(last_id - len(rows) + 1, last_id + 1))
+    return jsonify({'message': f'{label} created successfully', 'ids': ids}), 201
+
+
+# Columns whose rows must be gone before a user or product can be deleted;
+# sales history is never rewritten to drop the reference.
+USER_REFERENCES = [Order.user_id]
+PRODUCT_REFERENCES = [Inventory.product_id, Order.product_id, OrderLine.product_id]
+
+
+def referencing_tables(columns, value):
+    return [column.table.name for column in columns
+            if db.session.query(column).filter(column == value).first() is not None]
+
+
+@api.route('/')
 def index():
     return render_template('index.html')
 
 
-@app.route('/api/users', methods=['GET', 'POST'])
+@api.route('/api/users', methods=['GET', 'POST'])
 def api_manage_users():
     if request.method == 'GET':
-        users = User.query.all()
-        user_list = [{
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        } for user in users]
-        return jsonify(user_list)
+        return list_response(User)
 
     elif request.method == 'POST':
         data = request.json
+        if isinstance(data, list):
+            return bulk_create(User, data, ['username', 'password'],
+                               ['first_name', 'last_name', 'email', 'phone_number'],
+                               'Users')
         new_user = User(username=data['username'],
                         password=data['password'],
                         first_name=data.get('first_name'),
@@ -167,16 +1261,13 @@ def api_manage_users():
         return jsonify({'message': 'User created successfully'}), 201
 
 
-@app.route('/api/users/<int:user_id>', methods=['GET', 'PUT', 'DELETE'])
+@api.route('/api/users/<int:user_id>', methods=['GET', 'PUT', 'DELETE'])
 def api_manage_user(user_id):
-    user = User.query.get_or_404(user_id)
+    query, serialize = shaped(User)
+    user = query.get_or_404(user_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        })
+        return jsonify(serialize(user))
 
     elif request.method == 'PUT':
         data = request.json
@@ -190,70 +1281,121 @@ def api_manage_user(user_id):
         return jsonify({'message': 'User updated successfully'})
 
     elif request.method == 'DELETE':
+        referenced_by = referencing_tables(USER_REFERENCES, user_id)
+        if referenced_by:
+            return jsonify({'message': f"User is still referenced by "
+                                       f"{', '.join(referenced_by)}"}), 409
         db.session.delete(user)
         db.session.commit()
         return jsonify({'message': 'User deleted successfully'})
 
 
-@app.route('/api/products', methods=['GET', 'POST'])
+@api.route('/api/products', methods=['GET', 'POST'])
+@conditional_get('product', version=catalog_version)
 def api_manage_products():
     if request.method == 'GET':
-        products = Product.query.all()
-        product_list = [{
-            'id': product.id,
-            'name': product.name,
-            'price': product.price
-        } for product in products]
-        return jsonify(product_list)
+        after_id, limit = page_params()
+        return Response(catalog_cache().page(after_id, limit),
+                        mimetype='application/json')
 
     elif request.method == 'POST':
         data = request.json
-        new_product = Product(name=data['name'], price=data['price'])
+        if isinstance(data, list):
+            response = bulk_create(Product, data, ['name', 'price'], ['barcode'],
+                                   'Products')
+            catalog_cache().invalidate()
+            return response
+        new_product = Product(name=data['name'], price=data['price'],
+                              barcode=data.get('barcode'))
         db.session.add(new_product)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'message': 'Barcode is already assigned to a product'}), 409
+        catalog_cache().invalidate()
         return jsonify({'message': 'Product created successfully'}), 201
 
 
-@app.route('/api/products/<int:product_id>', methods=['GET', 'PUT', 'DELETE'])
+@api.route('/api/products/by-barcode/<code>', methods=['GET'])
+@conditional_get('product', version=catalog_version)
+def api_product_by_barcode(code):
+    # Scans resolve through the catalog cache's barcode map: a dict lookup
+    # returning an already encoded product, with no query on the hot path.
+    encoded = catalog_cache().get_by_barcode(code)
+    if encoded is None:
+        abort(404)
+    return Response(encoded, mimetype='application/json')
+
+
+SEARCH_TERM = re.compile(r'\w+')
+DEFAULT_SEARCH_LIMIT = 20
+
+
+@api.route('/api/products/search', methods=['GET'])
+@conditional_get('product', version=catalog_version)
+def api_search_products():
+    terms = SEARCH_TERM.findall(request.args.get('q', ''))
+    if not terms:
+        return jsonify({'message': 'q must contain at least one word'}), 400
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    # Every term becomes a quoted prefix query, so "coca ze" finds
+    # "Coca-Cola Zero". FTS5 ranks by bm25; the products themselves come
+    # pre-encoded from the catalog cache.
+    match = ' '.join(f'"{term}"*' for term in terms)
+    product_ids = db.session.execute(
+        db.text('SELECT rowid FROM product_fts WHERE product_fts MATCH :match '
+                'ORDER BY rank LIMIT :limit'),
+        {'match': match, 'limit': limit}).scalars().all()
+    return Response(catalog_cache().encode_many(product_ids),
+                    mimetype='application/json')
+
+
+@api.route('/api/products/<int:product_id>', methods=['GET', 'PUT', 'DELETE'])
+@conditional_get('product', version=catalog_version)
 def api_manage_product(product_id):
-    product = Product.query.get_or_404(product_id)
-
     if request.method == 'GET':
-        return jsonify({
-            'id': product.id,
-            'name': product.name,
-            'price': product.price
-        })
+        encoded = catalog_cache().get(product_id)
+        if encoded is None:
+            abort(404)
+        return Response(encoded, mimetype='application/json')
 
-    elif request.method == 'PUT':
+    product = Product.query.get_or_404(product_id)
+
+    if request.method == 'PUT':
         data = request.json
         product.name = data.get('name', product.name)
         product.price = data.get('price', product.price)
-        db.session.commit()
+        product.barcode = data.get('barcode', product.barcode)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'message': 'Barcode is already assigned to a product'}), 409
+        catalog_cache().invalidate()
         return jsonify({'message': 'Product updated successfully'})
 
     elif request.method == 'DELETE':
+        referenced_by = referencing_tables(PRODUCT_REFERENCES, product_id)
+        if referenced_by:
+            return jsonify({'message': f"Product is still referenced by "
+                                       f"{', '.join(referenced_by)}"}), 409
         db.session.delete(product)
         db.session.commit()
+        catalog_cache().invalidate()
         return jsonify({'message': 'Product deleted successfully'})
 
 
-@app.route('/api/orders', methods=['GET', 'POST'])
+@api.route('/api/orders', methods=['GET', 'POST'])
 def api_manage_orders():
     if request.method == 'GET':
-        orders = Order.query.all()
-        order_list = [{
-            'id': order.id,
-            'user_id': order.user_id,
-            'product_id': order.product_id,
-            'quantity': order.quantity,
-            'total_price': order.total_price,
-            'timestamp': order.timestamp
-        } for order in orders]
-        return jsonify(order_list)
+        return list_response(Order, streamable=True)
 
     elif request.method == 'POST':
         data = request.json
+        if 'lines' in data:
+            return create_basket_order(data)
         new_order = Order(user_id=data['user_id'],
                           product_id=data['product_id'],
                           quantity=data['quantity'],
@@ -263,19 +1405,47 @@ def api_manage_orders():
         return jsonify({'message': 'Order created successfully'}), 201
 
 
-@app.route('/api/orders/<int:order_id>', methods=['GET', 'PUT', 'DELETE'])
+def create_basket_order(data):
+    lines = data['lines']
+    if not isinstance(lines, list) or not lines:
+        return jsonify({'message': 'Order must contain at least one line'}), 400
+    for position, line in enumerate(lines):
+        if (not isinstance(line, dict) or not is_integer(line.get('product_id'))
+                or not is_stock_delta(line.get('quantity')) or line['quantity'] < 0):
+            return jsonify({'message': f'Line {position} needs a product_id '
+                                       'and a positive integer quantity'}), 400
+        if not is_money(line.get('unit_price', 0)):
+            return jsonify({
+                'message': f'Line {position}: unit_price must be a number'
+            }), 400
+    if not is_money(data.get('total_price', 0)):
+        return jsonify({'message': 'total_price must be a number'}), 400
+    new_order = Order(user_id=data['user_id'],
+                      product_id=None,
+                      quantity=sum(line['quantity'] for line in lines),
+                      total_price=0)
+    db.session.add(new_order)
+    db.session.flush()
+    rows = build_order_lines(new_order.id, lines)
+    if rows is None:
+        db.session.rollback()
+        return jsonify({'message': 'Unknown product in order lines'}), 400
+    new_order.total_price = data.get('total_price',
+                                     sum(row['line_total'] for row in rows))
+    # A list of parameter dicts makes SQLAlchemy issue a single executemany.
+    db.session.execute(db.insert(OrderLine), rows)
+    db.session.commit()
+    return jsonify({'message': 'Order created successfully',
+                    'order_id': new_order.id}), 201
+
+
+@api.route('/api/orders/<int:order_id>', methods=['GET', 'PUT', 'DELETE'])
 def api_manage_order(order_id):
-    order = Order.query.get_or_404(order_id)
+    query, serialize = shaped(Order)
+    order = query.get_or_404(order_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': order.id,
-            'user_id': order.user_id,
-            'product_id': order.product_id,
-            'quantity': order.quantity,
-            'total_price': order.total_price,
-            'timestamp': order.timestamp
-        })
+        return jsonify(serialize(order))
 
     elif request.method == 'PUT':
         data = request.json
@@ -292,21 +1462,82 @@ def api_manage_order(order_id):
         return jsonify({'message': 'Order deleted successfully'})
 
 
-@app.route('/api/customers', methods=['GET', 'POST'])
+@api.route('/api/orders/<int:order_id>/lines', methods=['GET'])
+def api_order_lines(order_id):
+    lines = OrderLine.query.filter_by(order_id=order_id).order_by(OrderLine.id).all()
+    serialize = serializer_for(OrderLine)
+    return jsonify([serialize(line) for line in lines])
+
+
+CHECKOUT_FIELDS = ['user_id', 'product_id', 'quantity', 'total_price', 'payment_method']
+
+
+@api.route('/api/checkout', methods=['POST'])
+def api_checkout():
+    data = request.json
+    # Everything is checked before the stock UPDATE runs; a negative quantity
+    # would otherwise restock the product and record a negative sale.
+    if not isinstance(data, dict):
+        return jsonify({'message': 'Request body must be an object'}), 400
+    missing = [field for field in CHECKOUT_FIELDS if data.get(field) is None]
+    if missing:
+        return jsonify({'message': f"Checkout is missing {', '.join(missing)}"}), 400
+    if not is_integer(data['user_id']) or not is_integer(data['product_id']):
+        return jsonify({'message': 'user_id and product_id must be integers'}), 400
+    quantity = data['quantity']
+    if not is_stock_delta(quantity) or quantity < 0:
+        return jsonify({'message': 'quantity must be a positive integer'}), 400
+    if not is_money(data['total_price']) or not is_money(data.get('amount', 0)):
+        return jsonify({'message': 'total_price and amount must be numbers'}), 400
+    total_price = data['total_price']
+
+    # Order, payment, sale and stock decrement share one transaction and one
+    # commit. The conditional UPDATE runs first so the write lock is taken up
+    # front and a short stock aborts before anything is inserted.
+    deltas = {data['product_id']: -quantity}
+    levels, short = adjust_stock(deltas)
+    if levels is None:
+        return stock_error(short)
+
+    new_order = Order(user_id=data['user_id'],
+                      product_id=data['product_id'],
+                      quantity=quantity,
+                      total_price=total_price)
+    db.session.add(new_order)
+    db.session.flush()
+    new_payment = Payment(order_id=new_order.id,
+                          amount=data.get('amount', total_price),
+                          payment_method=data['payment_method'],
+                          payment_status=data.get('payment_status', 'completed'))
+    new_sale = Sale(order_id=new_order.id, total_revenue=total_price)
+    db.session.add_all([new_payment, new_sale])
+    alerts = low_stock_alerts(deltas, levels)
+    db.session.commit()
+    announce_low_stock(alerts)
+    return jsonify({
+        'message': 'Checkout completed successfully',
+        'order_id': new_order.id,
+        'payment_id': new_payment.id,
+        'sale_id': new_sale.id
+    }), 201
+
+
+@api.route('/api/customers', methods=['GET', 'POST'])
 def api_manage_customers():
     if request.method == 'GET':
-        customers = Customer.query.all()
-        customer_list = [{
-            'id': customer.id,
-            'first_name': customer.first_name,
-            'last_name': customer.last_name,
-            'email': customer.email,
-            'phone_number': customer.phone_number
-        } for customer in customers]
-        return jsonify(customer_list)
+        filters = []
+        if 'phone' in request.args:
+            filters.append(Customer.phone_key == normalize_phone(request.args['phone']))
+        if 'email' in request.args:
+            filters.append(Customer.email_key == normalize_email(request.args['email']))
+        return list_response(Customer, filters=filters)
 
     elif request.method == 'POST':
         data = request.json
+        if isinstance(data, list):
+            return bulk_create(Customer, data, [],
+                               ['first_name', 'last_name', 'email', 'phone_number'],
+                               'Customers')
         new_customer = Customer(first_name=data.get('first_name'),
                                 last_name=data.get('last_name'),
                                 email=data.get('email'),
@@ -316,18 +1547,13 @@ def api_manage_customers():
         return jsonify({'message': 'Customer created successfully'}), 201
 
 
-@app.route('/api/customers/<int:customer_id>', methods=['GET', 'PUT', 'DELETE'])
+@api.route('/api/customers/<int:customer_id>', methods=['GET', 'PUT', 'DELETE'])
 def api_manage_customer(customer_id):
-    customer = Customer.query.get_or_404(customer_id)
+    query, serialize = shaped(Customer)
+    customer = query.get_or_404(customer_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': customer.id,
-            'first_name': customer.first_name,
-            'last_name': customer.last_name,
-            'email': customer.email,
-            'phone_number': customer.phone_number
-        })
+        return jsonify(serialize(customer))
 
     elif request.method == 'PUT':
         data = request.json
@@ -344,19 +1570,10 @@ def api_manage_customer(customer_id):
         return jsonify({'message': 'Customer deleted successfully'})
 
 
-@app.route('/api/payments', methods=['GET', 'POST'])
+@api.route('/api/payments', methods=['GET', 'POST'])
 def api_manage_payments():
     if request.method == 'GET':
-        payments = Payment.query.all()
-        payment_list = [{
-            'id': payment.id,
-            'order_id': payment.order_id,
-            'amount': payment.amount,
-            'payment_method': payment.payment_method,
-            'payment_status': payment.payment_status,
-            'timestamp': payment.timestamp
-        } for payment in payments]
-        return jsonify(payment_list)
+        return list_response(Payment, streamable=True)
 
     elif request.method == 'POST':
         data = request.json
@@ -369,19 +1586,13 @@ def api_manage_payments():
         return jsonify({'message': 'Payment created successfully'}), 201
 
 
-@app.route('/api/payments/<int:payment_id>', methods=['GET', 'PUT', 'DELETE'])
+@api.route('/api/payments/<int:payment_id>', methods=['GET', 'PUT', 'DELETE'])
 def api_manage_payment(payment_id):
-    payment = Payment.query.get_or_404(payment_id)
+    query, serialize = shaped(Payment)
+    payment = query.get_or_404(payment_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': payment.id,
-            'order_id': payment.order_id,
-            'amount': payment.amount,
-            'payment_method': payment.payment_method,
-            'payment_status': payment.payment_status,
-            'timestamp': payment.timestamp
-        })
+        return jsonify(serialize(payment))
 
     elif request.method == 'PUT':
         data = request.json
@@ -398,37 +1609,235 @@ def api_manage_payment(payment_id):
         return jsonify({'message': 'Payment deleted successfully'})
 
 
-@app.route('/api/inventory', methods=['GET', 'POST'])
+@api.route('/api/inventory', methods=['GET', 'POST'])
+@conditional_get('inventory')
 def api_manage_inventory():
     if request.method == 'GET':
-        inventory = Inventory.query.all()
-        inventory_list = [{
-            'id': item.id,
-            'product_id': item.product_id,
-            'quantity': item.quantity
-        } for item in inventory]
-        return jsonify(inventory_list)
+        return list_response(Inventory)
 
     elif request.method == 'POST':
         data = request.json
+        if isinstance(data, list):
+            for position, item in enumerate(data):
+                if isinstance(item, dict) and not is_reorder_point(
+                        item.get('reorder_point')):
+                    return jsonify({
+                        'message': f'Item {position}: {REORDER_POINT_ERROR}'
+                    }), 400
+            return bulk_create(Inventory, data, ['product_id', 'quantity'],
+                               ['reorder_point'], 'Inventory items')
+        if not isinstance(data, dict):
+            return jsonify({'message': 'Request body must be an object'}), 400
+        for field in ['product_id', 'quantity']:
+            if data.get(field) is None:
+                return jsonify({'message': f'Inventory item is missing {field}'}), 400
+            error = field_error(Inventory, field, data[field])
+            if error:
+                return jsonify({'message': error}), 400
+        if not is_reorder_point(data.get('reorder_point')):
+            return jsonify({'message': REORDER_POINT_ERROR}), 400
         new_inventory = Inventory(product_id=data['product_id'],
-                                  quantity=data['quantity'])
+                                  quantity=data['quantity'],
+                                  reorder_point=data.get('reorder_point'))
         db.session.add(new_inventory)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'message': 'Product already has an inventory item'}), 409
         return jsonify({'message': 'Inventory item created successfully'}), 201
 
 
-@app.route('/api/sales', methods=['GET', 'POST'])
+@api.route('/api/inventory/<int:product_id>/adjust', methods=['POST'])
+def api_adjust_inventory(product_id):
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'message': 'Request body must be an object'}), 400
+    delta = data.get('delta')
+    if not is_stock_delta(delta):
+        return jsonify({'message': 'delta must be a non-zero integer'}), 400
+    deltas = {product_id: delta}
+    levels, short = adjust_stock(deltas)
+    if levels is None:
+        return stock_error(short)
+    alerts = low_stock_alerts(deltas, levels)
+    db.session.commit()
+    return jsonify({'product_id': product_id, 'quantity': levels[product_id].quantity,
+                    'alerts': announce_low_stock(alerts)})
+
+
+@api.route('/api/inventory/adjust', methods=['POST'])
+def api_adjust_inventory_batch():
+    # A whole basket is adjusted in one transaction: either every product
+    # has the stock or nothing changes. Repeated products are summed first
+    # so the check covers the basket's total for each.
+    items = request.json
+    if not isinstance(items, list) or not items:
+        return jsonify({'message': 'Request body must be a non-empty list'}), 400
+    deltas = {}
+    for position, item in enumerate(items):
+        if (not isinstance(item, dict) or not is_integer(item.get('product_id'))
+                or not is_stock_delta(item.get('delta'))):
+            return jsonify({'message': f'Item {position} needs a product_id '
+                                       'and a non-zero integer delta'}), 400
+        deltas[item['product_id']] = deltas.get(item['product_id'], 0) + item['delta']
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    levels, short = adjust_stock(deltas)
+    if levels is None:
+        return stock_error(short)
+    alerts = low_stock_alerts(deltas, levels)
+    db.session.commit()
+    return jsonify({'items': [{'product_id': product_id, 'quantity': level.quantity}
+                              for product_id, level in levels.items()],
+                    'alerts': announce_low_stock(alerts)})
+
+
+@api.route('/api/inventory/low-stock', methods=['GET'])
+@conditional_get('inventory')
+def api_low_stock():
+    # The condition must match the partial index's WHERE clause verbatim
+    # for SQLite to use it.
+    return list_response(Inventory, filters=[db.text('quantity <= reorder_point')])
+
+
+FORECAST_HISTORY_DAYS = 730
+FORECAST_SPAN_DAYS = 28
+DEFAULT_FORECAST_HORIZON = 90
+MAX_FORECAST_HORIZON = 365
+
+
+@functools.cache
+def load_numpy():
+    # Imported on first use rather than at startup; it is the heaviest
+    # import here and only the forecast needs it.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def demand_model(_rollup_version, today, history_days=FORECAST_HISTORY_DAYS,
+                 span_days=FORECAST_SPAN_DAYS):
+    # Daily units per product as a dense products x days matrix, reduced to
+    # an EMA velocity and weekday factors. _rollup_version and today only key
+    # the app's cache of it (see create_app): a new sale, or the window moving
+    # on a day, rebuilds it.
+    numpy = load_numpy()
+    start = today - timedelta(days=history_days - 1)
+    # Read straight off the DBAPI cursor: numpy converts plain tuples
+    # quickly but SQLAlchemy Rows very slowly. NOT INDEXED because the window
+    # covers most of the rollup, where a table scan beats the (day,
+    # product_id) key plus a row lookup for units.
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(
+        'SELECT product_id, CAST(julianday(day) - julianday(:start) AS INTEGER), units '
+        'FROM daily_sales_rollup NOT INDEXED WHERE day BETWEEN :start AND :today',
+        {'start': start.isoformat(), 'today': today.isoformat()})
+    sold = numpy.array(cursor.fetchall(), dtype=numpy.int64).reshape(-1, 3)
+    product_ids, rows_product = numpy.unique(sold[:, 0], return_inverse=True)
+    units = numpy.zeros((len(product_ids), history_days), dtype=numpy.float32)
+    units[rows_product, sold[:, 1]] = sold[:, 2]
+
+    # The last value of s[t] = a * x[t] + (1 - a) * s[t - 1], seeded with
+    # x[0], is a weighted sum of the columns: one matrix-vector product.
+    alpha = 2 / (span_days + 1)
+    weights = alpha * (1 - alpha) ** numpy.arange(history_days - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (history_days - 1)
+    weights = weights.astype(numpy.float32)
+    velocity = units @ weights
+
+    weekdays = (numpy.arange(history_days) + start.weekday()) % 7
+    weekday_means = (units @ (weekdays[:, None] == numpy.arange(7))
+                     / numpy.bincount(weekdays, minlength=7))
+    daily_mean = units.mean(axis=1, keepdims=True)
+    factors = numpy.divide(weekday_means, daily_mean,
+                           out=numpy.ones_like(weekday_means), where=daily_mean > 0)
+    return product_ids, velocity, factors
+
+
+def forecast_cover(today, horizon):
+    numpy = load_numpy()
+    product_ids, velocity, factors = current_app.extensions['demand_model'](
+        table_version('daily_sales_rollup'), today)
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute('SELECT product_id, SUM(quantity) FROM inventory '
+                   'GROUP BY product_id ORDER BY product_id')
+    stock = numpy.array(cursor.fetchall(), dtype=numpy.int64).reshape(-1, 2)
+    stocked_ids, quantity = stock[:, 0], stock[:, 1]
+
+    # Line the model up with the stocked products; products that never sold
+    # get zero velocity.
+    position = numpy.searchsorted(product_ids, stocked_ids)
+    known = position < len(product_ids)
+    known[known] = product_ids[position[known]] == stocked_ids[known]
+    rate = numpy.zeros(len(stocked_ids))
+    rate[known] = velocity[position[known]]
+    seasonal = numpy.ones((len(stocked_ids), 7), dtype=numpy.float32)
+    seasonal[known] = factors[position[known]]
+
+    # Cumulative projected demand, day by day over the horizon, with each
+    # day scaled by its weekday factor. Days of cover is the count of days
+    # the current stock still covers; reaching the horizon means "beyond".
+    weekdays = (numpy.arange(1, horizon + 1) + today.weekday()) % 7
+    demand = rate.astype(numpy.float32)[:, None] * seasonal[:, weekdays]
+    numpy.cumsum(demand, axis=1, out=demand)
+    cover = (demand < quantity[:, None]).sum(axis=1)
+    return stocked_ids, quantity, rate, cover
+
+
+@api.route('/api/inventory/forecast', methods=['GET'])
+def api_inventory_forecast():
+    if load_numpy() is None:
+        return jsonify({'message': 'Forecasting requires numpy'}), 501
+    horizon = request.args.get('horizon', DEFAULT_FORECAST_HORIZON, type=int)
+    horizon = min(max(horizon, 1), MAX_FORECAST_HORIZON)
+    today = datetime.now(timezone.utc).date()
+    product_ids, quantity, rate, cover = forecast_cover(today, horizon)
+    items = []
+    rows = zip(product_ids.tolist(), quantity.tolist(), rate.round(3).tolist(),
+               cover.tolist(), strict=True)
+    for product_id, stock, velocity, days in rows:
+        covered = days < horizon
+        # Stock on hand lasts through day `days`; with none left it is
+        # already out today.
+        stockout = today + timedelta(days=days + 1 if stock > 0 else 0)
+        items.append({
+            'product_id': product_id,
+            'quantity': stock,
+            'daily_units': velocity,
+            'days_of_cover': days if covered else None,
+            'stockout_date': stockout.isoformat() if covered else None,
+        })
+    return jsonify({'horizon': horizon, 'items': items})
+
+
+@api.route('/api/inventory/<int:product_id>', methods=['GET', 'PUT'])
+@conditional_get('inventory')
+def api_manage_inventory_item(product_id):
+    # Quantities change only through /adjust; PUT sets the reorder point.
+    query, serialize = shaped(Inventory)
+    inventory = query.filter_by(product_id=product_id).first_or_404()
+
+    if request.method == 'GET':
+        return jsonify(serialize(inventory))
+
+    elif request.method == 'PUT':
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'message': 'Request body must be an object'}), 400
+        reorder_point = data.get('reorder_point', inventory.reorder_point)
+        if not is_reorder_point(reorder_point):
+            return jsonify({'message': REORDER_POINT_ERROR}), 400
+        inventory.reorder_point = reorder_point
+        db.session.commit()
+        return jsonify({'message': 'Inventory item updated successfully'})
+
+
+@api.route('/api/sales', methods=['GET', 'POST'])
 def api_manage_sales():
     if request.method == 'GET':
-        sales = Sale.query.all()
-        sale_list = [{
-            'id': sale.id,
-            'order_id': sale.order_id,
-            'total_revenue': sale.total_revenue,
-            'timestamp': sale.timestamp
-        } for sale in sales]
-        return jsonify(sale_list)
+        return list_response(Sale, streamable=True)
 
     elif request.method == 'POST':
         data = request.json
@@ -439,17 +1848,13 @@ def api_manage_sales():
         return jsonify({'message': 'Sale created successfully'}), 201
 
 
-@app.route('/api/sales/<int:sale_id>', methods=['GET', 'PUT', 'DELETE'])
+@api.route('/api/sales/<int:sale_id>', methods=['GET', 'PUT', 'DELETE'])
 def api_manage_sale(sale_id):
-    sale = Sale.query.get_or_404(sale_id)
+    query, serialize = shaped(Sale)
+    sale = query.get_or_404(sale_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': sale.id,
-            'order_id': sale.order_id,
-            'total_revenue': sale.total_revenue,
-            'timestamp': sale.timestamp
-        })
+        return jsonify(serialize(sale))
 
     elif request.method == 'PUT':
         data = request.json
@@ -464,18 +1869,86 @@ def api_manage_sale(sale_id):
         return jsonify({'message': 'Sale deleted successfully'})
 
 
-@app.route('/api/deliverymen', methods=['GET', 'POST'])
+def sales_report_from_rollup(bucket, start, end):
+    # Day and week product reports over whole days are answered from the
+    # rollup: one row per product per day instead of every sale.
+    period = REPORT_BUCKETS[bucket](DailySalesRollup.day).label('period')
+    query = (db.select(period, DailySalesRollup.product_id,
+                       db.func.sum(DailySalesRollup.sales).label('sales'),
+                       db.func.sum(DailySalesRollup.units).label('units'),
+                       db.func.sum(DailySalesRollup.revenue).label('revenue'))
+             .group_by(period, DailySalesRollup.product_id)
+             .having(db.func.sum(DailySalesRollup.sales) > 0))
+    if start is not None:
+        query = query.where(DailySalesRollup.day >= start[:10])
+    if end is not None:
+        query = query.where(DailySalesRollup.day < end[:10])
+    rows = db.session.execute(query.order_by(period)).mappings().all()
+    return jsonify({
+        'bucket': bucket,
+        'group': 'product',
+        'rows': [dict(row) for row in rows]
+    })
+
+
+@api.route('/api/reports/sales', methods=['GET'])
+def api_sales_report():
+    bucket = request.args.get('bucket', 'day')
+    group = request.args.get('group')
+    if bucket not in REPORT_BUCKETS:
+        return jsonify({'message': 'bucket must be one of hour, day, week'}), 400
+    if group not in (None, 'product', 'payment_method'):
+        return jsonify({'message': 'group must be product or payment_method'}), 400
+    try:
+        start = parse_report_time('from')
+        end = parse_report_time('to')
+    except ValueError:
+        return jsonify({'message': 'from and to must be ISO 8601 timestamps'}), 400
+
+    whole_days = all(value is None or value.endswith('00:00:00')
+                     for value in (start, end))
+    if group == 'product' and bucket != 'hour' and whole_days:
+        return sales_report_from_rollup(bucket, start, end)
+
+    period = REPORT_BUCKETS[bucket](Sale.timestamp).label('period')
+    if group == 'product':
+        items = sold_items()
+        query = (db.select(period, items.c.product_id,
+                           db.func.count(db.distinct(Sale.id)).label('sales'),
+                           db.func.sum(items.c.quantity).label('units'),
+                           db.func.sum(items.c.revenue).label('revenue'))
+                 .join(items, items.c.order_id == Sale.order_id)
+                 .group_by(period, items.c.product_id))
+    elif group == 'payment_method':
+        query = (db.select(period, Payment.payment_method,
+                           db.func.count(db.distinct(Sale.id)).label('sales'),
+                           db.func.sum(Payment.amount).label('revenue'))
+                 .join(Payment, Payment.order_id == Sale.order_id)
+                 .group_by(period, Payment.payment_method))
+    else:
+        query = (db.select(period,
+                           db.func.count(Sale.id).label('sales'),
+                           db.func.sum(Sale.total_revenue).label('revenue'))
+                 .group_by(period))
+
+    timestamp = db.type_coerce(Sale.timestamp, db.String)
+    if start is not None:
+        query = query.where(timestamp >= start)
+    if end is not None:
+        query = query.where(timestamp < end)
+    rows = db.session.execute(query.order_by(period)).mappings().all()
+    return jsonify({
+        'bucket': bucket,
+        'group': group,
+        'rows': [dict(row) for row in rows]
+    })
+
+
+@api.route('/api/deliverymen', methods=['GET', 'POST'])
+@conditional_get('deliveryman')
 def api_manage_deliverymen():
     if request.method == 'GET':
-        deliverymen = Deliveryman.query.all()
-        deliverymen_list = [{
-            'id': deliveryman.id,
-            'first_name': deliveryman.first_name,
-            'last_name': deliveryman.last_name,
-            'email': deliveryman.email,
-            'phone_number': deliveryman.phone_number
-        } for deliveryman in deliverymen]
-        return jsonify(deliverymen_list)
+        return list_response(Deliveryman)
 
     elif request.method == 'POST':
         data = request.json
@@ -488,19 +1961,15 @@ def api_manage_deliverymen():
         return jsonify({'message': 'Deliveryman created successfully'}), 201
 
 
-@app.route('/api/deliverymen/<int:deliveryman_id>',
+@api.route('/api/deliverymen/<int:deliveryman_id>',
            methods=['GET', 'PUT', 'DELETE'])
+@conditional_get('deliveryman')
 def api_manage_deliveryman(deliveryman_id):
-    deliveryman = Deliveryman.query.get_or_404(deliveryman_id)
+    query, serialize = shaped(Deliveryman)
+    deliveryman = query.get_or_404(deliveryman_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': deliveryman.id,
-            'first_name': deliveryman.first_name,
-            'last_name': deliveryman.last_name,
-            'email': deliveryman.email,
-            'phone_number': deliveryman.phone_number
-        })
+        return jsonify(serialize(deliveryman))
 
     elif request.method == 'PUT':
         data = request.json
@@ -518,19 +1987,10 @@ def api_manage_deliveryman(deliveryman_id):
         return jsonify({'message': 'Deliveryman deleted successfully'})
 
 
-@app.route('/api/deliveries', methods=['GET', 'POST'])
+@api.route('/api/deliveries', methods=['GET', 'POST'])
 def api_manage_deliveries():
     if request.method == 'GET':
-        deliveries = Delivery.query.all()
-        delivery_list = [{
-            'id': delivery.id,
-            'order_id': delivery.order_id,
-            'deliveryman_id': delivery.deliveryman_id,
-            'delivery_status': delivery.delivery_status,
-            'delivery_address': delivery.delivery_address,
-            'delivery_timestamp': delivery.delivery_timestamp
-        } for delivery in deliveries]
-        return jsonify(delivery_list)
+        return list_response(Delivery)
 
     elif request.method == 'POST':
         data = request.json
@@ -544,20 +2004,14 @@ def api_manage_deliveries():
         return jsonify({'message': 'Delivery created successfully'}), 201
 
 
-@app.route('/api/deliveries/<int:delivery_id>',
+@api.route('/api/deliveries/<int:delivery_id>',
            methods=['GET', 'PUT', 'DELETE'])
 def api_manage_delivery(delivery_id):
-    delivery = Delivery.query.get_or_404(delivery_id)
+    query, serialize = shaped(Delivery)
+    delivery = query.get_or_404(delivery_id)
 
     if request.method == 'GET':
-        return jsonify({
-            'id': delivery.id,
-            'order_id': delivery.order_id,
-            'deliveryman_id': delivery.deliveryman_id,
-            'delivery_status': delivery.delivery_status,
-            'delivery_address': delivery.delivery_address,
-            'delivery_timestamp': delivery.delivery_timestamp
-        })
+        return jsonify(serialize(delivery))
 
     elif request.method == 'PUT':
         data = request.json
@@ -579,7 +2033,106 @@ def api_manage_delivery(delivery_id):
         return jsonify({'message': 'Delivery deleted successfully'})
 
 
+def create_app(config=None):
+    # Building the app only wires up config, the database and the routes;
+    # no connection is opened and the schema is left to `flask create-schema`
+    # (or serve(), when migrations are pending).
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///pos_database.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLITE_PRAGMAS'] = dict(DEFAULT_PRAGMAS)
+    app.config['CATALOG_CACHE_CHECK_INTERVAL'] = 1.0
+    # More repeats of one statement shape than this in a request are logged.
+    app.config['QUERY_REPEAT_WARNING'] = 10
+    app.config.update(config or {})
+    app.json = POSJSONProvider(app)
+    db.init_app(app)
+    listen_engine_events(app)
+    app.extensions['catalog_cache'] = CatalogCache()
+    app.extensions['demand_model'] = functools.lru_cache(maxsize=4)(demand_model)
+    app.register_blueprint(api)
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - started
+    return app
+
+
+STARTUP_PROBE = f"""
+import time
+started = time.perf_counter()
+import {__name__}
+imported = time.perf_counter()
+{__name__}.create_app()
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+@api.cli.command('startup-time')
+@click.option('--runs', default=5, show_default=True)
+def startup_time_command(runs):
+    """Measure a cold start: module import and create_app, in fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', STARTUP_PROBE],
+                                cwd=current_app.root_path, capture_output=True,
+                                text=True, check=True)
+        samples.append([float(value) for value in result.stdout.split()])
+    for label, values in zip(['import', 'create_app'], zip(*samples, strict=True),
+                             strict=True):
+        median = statistics.median(values) * 1000
+        click.echo(f'{label}: {median:.1f} ms median of {runs}')
+
+
+def schema_is_current():
+    with db.engine.connect() as connection:
+        version = connection.exec_driver_sql('PRAGMA user_version').scalar()
+        return version == len(MIGRATIONS)
+
+
+def serve():
+    # Production server: gunicorn pre-forks WEB_CONCURRENCY workers (default
+    # one per core), each running THREADS request threads, with the debugger
+    # and reloader off. SIGHUP reloads the workers gracefully. For local
+    # development use `flask --app main run --debug` instead.
+    from gunicorn.app.base import BaseApplication
+
+    app = create_app()
+
+    class POSApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    def dispose_engine_after_fork(_server, _worker):
+        # Pooled SQLite connections must not cross a fork; each worker opens
+        # its own. close=False leaves the parent's connections alone.
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+    # Boot costs one PRAGMA read. The full schema pass runs only for a new
+    # database or pending migrations, once in the master before any worker
+    # exists; its connections are then dropped so none is inherited.
+    with app.app_context():
+        if not schema_is_current():
+            create_schema()
+        db.engine.dispose()
+
+    POSApplication({
+        'bind': f"0.0.0.0:{os.environ.get('PORT', '5000')}",
+        'workers': int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)),
+        'threads': int(os.environ.get('THREADS', 4)),
+        'worker_class': 'gthread',
+        'graceful_timeout': int(os.environ.get('GRACEFUL_TIMEOUT', 30)),
+        'post_fork': dispose_engine_after_fork,
+        'accesslog': '-',
+    }).run()
+
+
 if __name__ == '__main__':
-  with app.app_context():
-      db.create_all()
-  app.run(debug=True, port=5000)
+  serve()
@@ -0,0 +1,30 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = main.create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'pos_database.db'}",
+    })
+    with app.app_context():
+        main.create_schema()
+    yield app
+    with app.app_context():
+        main.db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def stocked(client):
+    client.post('/api/users', json={'username': 'till', 'password': 'secret'})
+    client.post('/api/products', json=[{'name': 'Apple', 'price': '0.50'},
+                                       {'name': 'Bread', 'price': '2.25'}])
+    client.post('/api/inventory', json=[{'product_id': 1, 'quantity': 100},
+                                        {'product_id': 2, 'quantity': 100}])
+    return client
@@ -0,0 +1,42 @@
+import main
+
+
+def test_write_during_load_is_not_served_stale(app, stocked, monkeypatch):
+    # Another thread commits a rename and invalidates the cache while this
+    # request is still loading the old catalog.
+    cache = app.extensions['catalog_cache']
+    load = cache._load
+
+    def racing_load(version):
+        snapshot = load(version)
+        monkeypatch.setattr(cache, '_load', load)
+        with main.db.engine.begin() as connection:
+            connection.exec_driver_sql("UPDATE product SET name = 'Pear' WHERE id = 1")
+        cache.invalidate()
+        return snapshot
+
+    monkeypatch.setattr(cache, '_load', racing_load)
+    stocked.get('/api/products/1')
+    # The snapshot read before the write must not be kept for the check
+    # interval.
+    assert stocked.get('/api/products/1').json['name'] == 'Pear'
+
+
+def test_local_write_invalidates(stocked):
+    assert stocked.get('/api/products/1').json['name'] == 'Apple'
+    stocked.put('/api/products/1', json={'name': 'Pear'})
+    assert stocked.get('/api/products/1').json['name'] == 'Pear'
+
+
+def test_each_app_has_its_own_catalog(stocked, tmp_path):
+    assert stocked.get('/api/products/1').json['name'] == 'Apple'
+    other = main.create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'other.db'}",
+    })
+    with other.app_context():
+        main.create_schema()
+    client = other.test_client()
+    client.post('/api/products', json={'name': 'Cheese', 'price': '4.00'})
+    assert client.get('/api/products/1').json['name'] == 'Cheese'
+    with other.app_context():
+        main.db.engine.dispose()
@@ -0,0 +1,43 @@
+def checkout(client):
+    response = client.post('/api/checkout', json={
+        'user_id': 1, 'product_id': 1, 'quantity': 2, 'total_price': '1.00',
+        'payment_method': 'cash'})
+    assert response.status_code == 201
+    return response.json['order_id']
+
+
+def product_report(client):
+    return client.get('/api/reports/sales?bucket=day&group=product').json['rows']
+
+
+def test_order_delete_removes_its_payments_and_sales(stocked):
+    order_id = checkout(stocked)
+    response = stocked.delete(f'/api/orders/{order_id}')
+    assert response.status_code == 200
+    assert stocked.get('/api/payments').json['items'] == []
+    assert stocked.get('/api/sales').json['items'] == []
+    assert product_report(stocked) == []
+
+
+def test_product_with_stock_or_orders_is_not_deleted(stocked):
+    assert stocked.delete('/api/products/1').status_code == 409
+    stocked.post('/api/products', json={'name': 'Cheese', 'price': '4.00'})
+    stocked.post('/api/orders', json={'user_id': 1, 'product_id': 3, 'quantity': 1,
+                                      'total_price': '4.00'})
+    response = stocked.delete('/api/products/3')
+    assert response.status_code == 409
+    assert 'order' in response.json['message']
+
+    checkout(stocked)
+    assert stocked.delete('/api/products/1').status_code == 409
+    assert len(product_report(stocked)) == 1
+    assert stocked.get('/api/orders').json['items'][0]['product_id'] == 3
+
+
+def test_user_with_orders_is_not_deleted(stocked):
+    checkout(stocked)
+    assert stocked.delete('/api/users/1').status_code == 409
+    stocked.post('/api/users', json={'username': 'spare', 'password': 'secret'})
+    assert stocked.delete('/api/users/2').status_code == 200
+    stocked.post('/api/products', json={'name': 'Cheese', 'price': '4.00'})
+    assert stocked.delete('/api/products/3').status_code == 200
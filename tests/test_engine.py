@@ -0,0 +1,18 @@
+import sqlalchemy
+
+import main
+
+
+def test_pragmas_apply_to_the_app_engine(app):
+    with app.app_context(), main.db.engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert connection.exec_driver_sql('PRAGMA cache_size').scalar() == -64000
+
+
+def test_other_engines_are_left_alone(app):
+    engine = sqlalchemy.create_engine('sqlite://')
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA cache_size').scalar() == -2000
+        assert 'query_started' not in connection.info
+    with app.app_context():
+        assert main.db.engine is not engine
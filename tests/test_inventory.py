@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+import main
+
+
+def test_adjust_rejects_overdraw(stocked):
+    response = stocked.post('/api/inventory/1/adjust', json={'delta': -101})
+    assert response.status_code == 409
+    response = stocked.post('/api/inventory/1/adjust', json={'delta': -100})
+    assert response.status_code == 200
+    assert response.json['quantity'] == 0
+
+
+def test_adjust_rejects_malformed_bodies(stocked):
+    assert stocked.post('/api/inventory/1/adjust', json=[-1]).status_code == 400
+    response = stocked.post('/api/inventory/adjust',
+                            json=[{'product_id': True, 'delta': -1}])
+    assert response.status_code == 400
+    assert stocked.get('/api/inventory').json['items'][0]['quantity'] == 100
+
+
+def test_duplicate_inventory_is_rejected(stocked):
+    response = stocked.post('/api/inventory', json={'product_id': 1, 'quantity': 3})
+    assert response.status_code == 409
+    response = stocked.post('/api/inventory', json=[{'product_id': 2, 'quantity': 3}])
+    assert response.status_code == 409
+
+
+@pytest.mark.usefixtures('stocked')
+def test_concurrent_adjust_never_oversells(app):
+    # Eight tills each try twenty sales of 5 against 100 units on hand:
+    # exactly twenty can succeed and the stock must end at zero, not below.
+    results = []
+    start = threading.Barrier(8)
+
+    def till():
+        client = app.test_client()
+        start.wait()
+        for _ in range(20):
+            response = client.post('/api/inventory/1/adjust', json={'delta': -5})
+            results.append(response.status_code)
+
+    threads = [threading.Thread(target=till) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(200) == 20
+    assert results.count(409) == 140
+    with app.app_context():
+        inventory = main.Inventory.query.filter_by(product_id=1).one()
+        assert inventory.quantity == 0
+
+
+def test_reorder_point_must_be_a_non_negative_integer(stocked):
+    for value in ['low', -1, 2.5, True]:
+        response = stocked.put('/api/inventory/1', json={'reorder_point': value})
+        assert response.status_code == 400
+        response = stocked.post('/api/inventory', json={
+            'product_id': 3, 'quantity': 1, 'reorder_point': value})
+        assert response.status_code == 400
+        response = stocked.post('/api/inventory', json=[
+            {'product_id': 3, 'quantity': 1, 'reorder_point': value}])
+        assert response.status_code == 400
+    response = stocked.put('/api/inventory/1', json={'reorder_point': None})
+    assert response.status_code == 200
+
+
+def test_low_stock_alert_is_sent_once_after_commit(app, stocked, monkeypatch):
+    stocked.put('/api/inventory/1', json={'reorder_point': 10})
+
+    def failing_receiver(_sender, **_alert):
+        raise RuntimeError('pager is down')
+
+    main.stock_low.connect(failing_receiver)
+    monkeypatch.setattr(app.logger, 'exception', lambda *_args: None)
+    try:
+        response = stocked.post('/api/inventory/1/adjust', json={'delta': -95})
+    finally:
+        main.stock_low.disconnect(failing_receiver)
+    assert response.status_code == 200
+    assert response.json['alerts'] == [
+        {'product_id': 1, 'quantity': 5, 'reorder_point': 10}]
+    response = stocked.post('/api/inventory/1/adjust', json={'delta': -1})
+    assert response.json['alerts'] == []
+
+
+def test_unchecked_reorder_points_are_cleared(app, stocked):
+    with app.app_context(), main.db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE inventory SET reorder_point = 'low' WHERE product_id = 1")
+        connection.exec_driver_sql(
+            'UPDATE inventory SET reorder_point = -3 WHERE product_id = 2')
+        main.migrate_clean_reorder_points(connection, {'inventory'})
+        points = connection.exec_driver_sql(
+            'SELECT reorder_point FROM inventory ORDER BY product_id').scalars().all()
+    assert points == [None, None]
+    assert stocked.get('/api/inventory/low-stock').json['items'] == []
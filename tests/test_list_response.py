@@ -0,0 +1,54 @@
+import json
+
+
+def place_orders(client, count):
+    for quantity in range(1, count + 1):
+        response = client.post('/api/orders', json={
+            'user_id': 1, 'product_id': 1, 'quantity': quantity,
+            'total_price': f'{quantity * 0.5:.2f}'})
+        assert response.status_code == 201
+
+
+def test_core_path_matches_orm_path(stocked):
+    place_orders(stocked, 3)
+    core = stocked.get('/api/orders').json
+    assert core['next_cursor'] is None
+    assert [order['quantity'] for order in core['items']] == [1, 2, 3]
+    assert core['items'][2]['total_price'] == 1.5
+
+    expanded = stocked.get('/api/orders?expand=user').json
+    users = [order.pop('user')['username'] for order in expanded['items']]
+    assert users == ['till'] * 3
+    assert expanded == core
+
+
+def test_next_cursor_walks_every_page(stocked):
+    place_orders(stocked, 5)
+    page = stocked.get('/api/orders?limit=2').json
+    assert [order['id'] for order in page['items']] == [1, 2]
+    assert page['next_cursor'] == 2
+    page = stocked.get('/api/orders?limit=2&after_id=4').json
+    assert [order['id'] for order in page['items']] == [5]
+    assert page['next_cursor'] is None
+
+
+def test_fields_with_and_without_id(stocked):
+    place_orders(stocked, 3)
+    # The cursor column is selected alongside the requested fields, including
+    # when id is one of them.
+    page = stocked.get('/api/orders?fields=id,quantity&limit=2').json
+    assert page['items'] == [{'id': 1, 'quantity': 1}, {'id': 2, 'quantity': 2}]
+    assert page['next_cursor'] == 2
+    page = stocked.get('/api/orders?fields=quantity&limit=2').json
+    assert page['items'] == [{'quantity': 1}, {'quantity': 2}]
+    assert page['next_cursor'] == 2
+    assert stocked.get('/api/orders?fields=secret').status_code == 400
+
+
+def test_stream_returns_every_row(stocked):
+    place_orders(stocked, 3)
+    response = stocked.get('/api/orders?stream=ndjson&fields=id')
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == [{'id': 1}, {'id': 2}, {'id': 3}]
+    assert stocked.get('/api/orders?stream=1').json == \
+        stocked.get('/api/orders').json['items']
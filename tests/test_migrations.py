@@ -0,0 +1,123 @@
+import sqlite3
+from decimal import Decimal
+
+import main
+
+# The tables as the first release created them: money as FLOAT, no rollup,
+# no lookup keys, barcode or reorder point, and inventory.product_id not
+# unique. user_version is left at 0.
+LEGACY_SCHEMA = '''
+CREATE TABLE "user" (
+    id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, password VARCHAR(50) NOT NULL,
+    first_name VARCHAR(50), last_name VARCHAR(50), email VARCHAR(100),
+    phone_number VARCHAR(15), PRIMARY KEY (id), UNIQUE (username));
+CREATE TABLE product (
+    id INTEGER NOT NULL, name VARCHAR(255) NOT NULL, price FLOAT NOT NULL,
+    PRIMARY KEY (id));
+CREATE TABLE "order" (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL, total_price FLOAT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id));
+CREATE TABLE payment (
+    id INTEGER NOT NULL, order_id INTEGER NOT NULL, amount FLOAT NOT NULL,
+    payment_method VARCHAR(50), payment_status VARCHAR(50),
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id));
+CREATE TABLE sale (
+    id INTEGER NOT NULL, order_id INTEGER NOT NULL, total_revenue FLOAT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id));
+CREATE TABLE inventory (
+    id INTEGER NOT NULL, product_id INTEGER NOT NULL, quantity INTEGER NOT NULL,
+    PRIMARY KEY (id));
+CREATE TABLE customer (
+    id INTEGER NOT NULL, first_name VARCHAR(50), last_name VARCHAR(50),
+    email VARCHAR(100), phone_number VARCHAR(15), PRIMARY KEY (id));
+
+INSERT INTO "user" VALUES (1, 'till', 'secret', NULL, NULL, NULL, NULL);
+INSERT INTO product VALUES (1, 'Apple', 0.1), (2, 'Bread', 2.675);
+INSERT INTO "order" VALUES (1, 1, 1, 3, 0.3, '2026-01-05 10:00:00'),
+                           (2, 1, 2, 1, 2.675, '2026-01-05 11:00:00');
+INSERT INTO payment VALUES (1, 1, 0.3, 'cash', 'Completed', '2026-01-05 10:00:00');
+INSERT INTO sale VALUES (1, 1, 0.3, '2026-01-05 10:00:00'),
+                        (2, 2, 2.675, '2026-01-05 11:00:00');
+INSERT INTO inventory VALUES (1, 1, 5), (2, 1, 3), (3, 2, 7);
+INSERT INTO customer VALUES (1, 'Ada', 'L', ' Ada@Example.com', '+1 (555) 010-2000');
+'''
+
+
+def legacy_app(tmp_path):
+    path = tmp_path / 'pos_database.db'
+    connection = sqlite3.connect(path)
+    connection.executescript(LEGACY_SCHEMA)
+    connection.close()
+    return main.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+
+
+def test_legacy_database_is_upgraded(tmp_path):
+    app = legacy_app(tmp_path)
+    with app.app_context():
+        main.create_schema()
+        assert main.schema_is_current()
+
+        # Money is stored as integer cents, rounded half away from zero.
+        rows = main.db.session.execute(main.db.text(
+            'SELECT id, price, typeof(price) FROM product ORDER BY id')).all()
+        assert rows == [(1, 10, 'integer'), (2, 268, 'integer')]
+        assert main.db.session.get(main.Product, 2).price == Decimal('2.68')
+        assert main.db.session.get(main.Order, 1).total_price == Decimal('0.30')
+        assert main.db.session.get(main.Payment, 1).amount == Decimal('0.30')
+
+        rollup = main.db.session.execute(
+            main.db.select(main.DailySalesRollup.product_id,
+                           main.DailySalesRollup.units)
+            .order_by(main.DailySalesRollup.product_id)).all()
+        assert rollup == [(1, 3), (2, 1)]
+
+        stock = main.db.session.execute(
+            main.db.select(main.Inventory.id, main.Inventory.product_id,
+                           main.Inventory.quantity)
+            .order_by(main.Inventory.id)).all()
+        assert stock == [(1, 1, 8), (3, 2, 7)]
+
+        customer = main.Customer.query.filter_by(
+            email_key=main.normalize_email('ada@example.com ')).one()
+        assert customer.id == 1
+        main.db.engine.dispose()
+
+
+def test_upgraded_database_enforces_new_constraints(tmp_path):
+    app = legacy_app(tmp_path)
+    with app.app_context():
+        main.create_schema()
+    client = app.test_client()
+    response = client.post('/api/inventory', json={'product_id': 1, 'quantity': 1})
+    assert response.status_code == 409
+    response = client.post('/api/checkout', json={
+        'user_id': 1, 'product_id': 2, 'quantity': 2, 'total_price': '5.36',
+        'payment_method': 'cash'})
+    assert response.status_code == 201
+    with app.app_context():
+        assert main.table_version('inventory') > 0
+        main.db.engine.dispose()
+
+
+def test_create_schema_is_idempotent(app):
+    with app.app_context():
+        main.create_schema()
+        main.create_schema()
+        assert main.schema_is_current()
+
+
+def test_rebuild_table_keeps_rows_and_converts(app):
+    with app.app_context():
+        with main.db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO product (id, name, price) VALUES (1, 'Apple', 50)")
+            main.rebuild_table(connection, main.Product.__table__,
+                               {'price': 'price * 2'})
+        with main.db.engine.connect() as connection:
+            row = connection.exec_driver_sql(
+                'SELECT id, name, price FROM product').one()
+            tables = {name for (name,) in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert tuple(row) == (1, 'Apple', 100)
+        assert 'product_new' not in tables
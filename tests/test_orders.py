@@ -0,0 +1,14 @@
+def test_basket_total_price_must_be_money(stocked):
+    lines = [{'product_id': 1, 'quantity': 2}]
+    response = stocked.post('/api/orders', json={'user_id': 1, 'lines': lines,
+                                                 'total_price': 'lots'})
+    assert response.status_code == 400
+    assert stocked.get('/api/orders').json['items'] == []
+
+
+def test_checkout_ids_must_be_integers(stocked):
+    for ids in ({'user_id': '1', 'product_id': 1}, {'user_id': 1, 'product_id': [1]}):
+        response = stocked.post('/api/checkout', json={
+            **ids, 'quantity': 1, 'total_price': '0.50', 'payment_method': 'cash'})
+        assert response.status_code == 400
+    assert stocked.get('/api/inventory').json['items'][0]['quantity'] == 100
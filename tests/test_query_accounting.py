@@ -0,0 +1,26 @@
+import main
+
+
+def test_failed_statement_is_counted_and_timer_released(app, stocked):
+    response = stocked.post('/api/inventory', json={'product_id': 1, 'quantity': 5})
+    assert response.status_code == 409
+    assert response.headers['X-DB-Queries'] == '1'
+    with app.app_context(), main.db.engine.connect() as connection:
+        assert connection.info.get('query_started') == []
+
+
+def test_repeated_statements_are_flagged_but_bulk_inserts_are_not(app, client, caplog):
+    app.config['QUERY_REPEAT_WARNING'] = 2
+    response = client.post('/api/products', json=[{'name': f'P{i}', 'price': 1}
+                                                  for i in range(5)])
+    assert response.json['ids'] == [1, 2, 3, 4, 5]
+    # One executemany for the rows plus the max(id) read.
+    assert response.headers['X-DB-Queries'] == '2'
+    assert 'Possible N+1' not in caplog.text
+
+    with app.test_request_context('/api/products'):
+        app.preprocess_request()
+        for product_id in range(1, 6):
+            main.db.session.get(main.Product, product_id)
+        app.process_response(app.response_class())
+    assert 'Possible N+1' in caplog.text
@@ -0,0 +1,81 @@
+import main
+
+
+def rollup_rows():
+    return main.db.session.execute(
+        main.db.select(main.DailySalesRollup.day, main.DailySalesRollup.product_id,
+                       main.DailySalesRollup.sales, main.DailySalesRollup.units,
+                       main.DailySalesRollup.revenue)
+        .where(main.DailySalesRollup.sales != 0)
+        .order_by(main.DailySalesRollup.day, main.DailySalesRollup.product_id)).all()
+
+
+def assert_rollup_matches_rebuild():
+    # What the triggers maintained must equal a rebuild from the live tables.
+    maintained = rollup_rows()
+    with main.db.engine.begin() as connection:
+        main.rebuild_sales_rollup(connection)
+    assert maintained == rollup_rows()
+    return maintained
+
+
+def checkout(client, product_id, quantity, total_price):
+    response = client.post('/api/checkout', json={
+        'user_id': 1, 'product_id': product_id, 'quantity': quantity,
+        'total_price': total_price, 'payment_method': 'cash'})
+    assert response.status_code == 201
+    return response.json['order_id']
+
+
+def test_table_version_counts_every_write(app, stocked):
+    with app.app_context():
+        before = main.table_version('product')
+    stocked.post('/api/products', json={'name': 'Cheese', 'price': '4.00'})
+    stocked.put('/api/products/3', json={'name': 'Brie'})
+    stocked.delete('/api/products/3')
+    with app.app_context():
+        assert main.table_version('product') == before + 3
+
+
+def test_rollup_follows_checkout(app, stocked):
+    checkout(stocked, 1, 3, '1.50')
+    checkout(stocked, 1, 2, '1.00')
+    with app.app_context():
+        rows = assert_rollup_matches_rebuild()
+    assert [(product_id, sales, units, str(revenue))
+            for _, product_id, sales, units, revenue in rows] == [(1, 2, 5, '2.50')]
+
+
+def test_rollup_follows_order_edits(app, stocked):
+    order_id = checkout(stocked, 1, 3, '1.50')
+    stocked.put(f'/api/orders/{order_id}', json={'product_id': 2, 'quantity': 5,
+                                                 'total_price': '11.25'})
+    with app.app_context():
+        rows = assert_rollup_matches_rebuild()
+    assert [(product_id, units) for _, product_id, _, units, _ in rows] == [(2, 5)]
+
+    stocked.delete(f'/api/orders/{order_id}')
+    with app.app_context():
+        assert assert_rollup_matches_rebuild() == []
+
+
+def test_rollup_follows_order_line_edits(app, stocked):
+    response = stocked.post('/api/orders', json={'user_id': 1, 'lines': [
+        {'product_id': 1, 'quantity': 2}, {'product_id': 2, 'quantity': 1}]})
+    order_id = response.json['order_id']
+    with app.app_context():
+        main.db.session.add(main.Sale(order_id, main.to_money('3.25')))
+        main.db.session.commit()
+        assert_rollup_matches_rebuild()
+
+        line = main.OrderLine.query.filter_by(order_id=order_id, product_id=1).one()
+        line.quantity = 4
+        line.line_total = line.unit_price * 4
+        main.db.session.add(main.OrderLine(order_id, 2, 1, '2.25'))
+        main.db.session.commit()
+        assert_rollup_matches_rebuild()
+
+        main.db.session.delete(line)
+        main.db.session.commit()
+        rows = assert_rollup_matches_rebuild()
+    assert [(product_id, units) for _, product_id, _, units, _ in rows] == [(2, 2)]